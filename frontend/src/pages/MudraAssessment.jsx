@@ -144,7 +144,7 @@ const MudraAssessment = () => {
 
       // Handle annotated image if available
       if (data.annotated_image) {
-        const annotatedImg = `data:image/jpeg;base64,${data.annotated_image}`;
+        const annotatedImg = `data:${data.annotated_image_type || "image/jpeg"};base64,${data.annotated_image}`;
         setAnnotatedImage(annotatedImg);
         console.log("🖼️ Annotated image received");
       }
@@ -0,0 +1,153 @@
+"""
+Admission control for the HTTP API: per-client token buckets with
+per-endpoint costs, plus load shedding on worker queue depth.
+
+The middleware calls admit() before a request reaches its endpoint. Work
+whose cost is only known later (hands found, Gemini calls, batch images) is
+billed from inside the request with charge(), which finds the client's bucket
+through a context variable, so worker threads can bill too.
+"""
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict
+
+_current = contextvars.ContextVar("admission_bucket", default=None)
+
+
+class TokenBucket:
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+        self.in_flight = 0
+
+
+class AdmissionController:
+    """
+    Each client has a bucket refilled at `rate` tokens per second up to
+    `burst`. A request takes its endpoint's cost up front, and later charges
+    may push the balance below zero (down to -burst), so a client that
+    triggers expensive work waits longer before its next request. Requests
+    the balance cannot cover get 429 with the time until it can as Retry-After.
+
+    load() returns how full the worker queue is (0-1). Above shed_start, a
+    request is only admitted when its client's bucket is at least as full as
+    the excess load, so clients that have been spending their allowance are
+    shed first (503) and occasional clients keep getting through until the
+    queue is actually full. Shed requests are told to retry after roughly one
+    recent request latency, by when the queue has turned over.
+
+    Independently of load, a client whose bucket is below half full may only
+    have heavy_slots sheddable requests in flight; more are shed straight
+    away. A heavy client therefore never fills the worker pool, and the other
+    slots stay free for everyone else. Requests count as in flight from
+    admit() until finish().
+    """
+
+    def __init__(self, rate=10.0, burst=40.0, shed_start=0.5, max_clients=10000, load=None, enabled=True,
+                 heavy_slots=2):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.shed_start = min(max(0.0, float(shed_start)), 1.0)
+        self.max_clients = max(1, int(max_clients))
+        self.load = load
+        self.enabled = enabled
+        self.heavy_slots = max(1, int(heavy_slots))
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._latency = 0.0
+        self.admitted = 0
+        self.limited = 0
+        self.shed = 0
+        self.charged = 0.0
+
+    def _bucket(self, client, now):
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        self._buckets.move_to_end(client)
+        return bucket
+
+    def admit(self, client, cost, shed=True):
+        """
+        Take cost tokens from client's bucket. Returns None when the request may
+        proceed, otherwise (status_code, retry_after_seconds) to reject it with.
+        """
+        if not self.enabled:
+            return None
+        load = self.load() if shed and self.load is not None else 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(client, now)
+            if shed and bucket.in_flight >= self.heavy_slots and bucket.tokens < self.burst / 2:
+                self.shed += 1
+                return 503, max(1, math.ceil(self._latency))
+            if load > self.shed_start:
+                excess = (load - self.shed_start) / (1.0 - self.shed_start) if self.shed_start < 1.0 else 1.0
+                if load >= 1.0 or bucket.tokens / self.burst < excess:
+                    self.shed += 1
+                    return 503, max(1, math.ceil(self._latency))
+            if bucket.tokens < cost:
+                self.limited += 1
+                return 429, max(1, math.ceil((cost - bucket.tokens) / self.rate))
+            bucket.tokens -= cost
+            if shed:
+                bucket.in_flight += 1
+            self.admitted += 1
+        _current.set((self, bucket, shed))
+        return None
+
+    def finish(self, seconds):
+        """
+        End the current request admitted by admit(): release its in-flight slot
+        and, for sheddable requests, record its latency (exponential moving average)
+        """
+        current = _current.get()
+        if current is None or current[0] is not self:
+            return
+        _current.set(None)
+        _, bucket, counted = current
+        if counted:
+            with self._lock:
+                bucket.in_flight -= 1
+            self.observe(seconds)
+
+    def charge_bucket(self, bucket, amount):
+        with self._lock:
+            bucket.tokens = max(-self.burst, bucket.tokens - amount)
+            self.charged += amount
+
+    def observe(self, seconds):
+        """Record an admitted request's latency (exponential moving average)"""
+        with self._lock:
+            self._latency = seconds if not self._latency else 0.9 * self._latency + 0.1 * seconds
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate": self.rate,
+                "burst": self.burst,
+                "shed_start": self.shed_start,
+                "heavy_slots": self.heavy_slots,
+                "clients": len(self._buckets),
+                "admitted": self.admitted,
+                "rate_limited": self.limited,
+                "shed": self.shed,
+                "charged": round(self.charged, 2),
+                "avg_latency_ms": round(self._latency * 1000, 1),
+            }
+
+
+def charge(amount):
+    """Bill extra cost to the current request's client; a no-op outside admitted HTTP requests"""
+    current = _current.get()
+    if current is not None and amount:
+        controller, bucket, _ = current
+        controller.charge_bucket(bucket, amount)
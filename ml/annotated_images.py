@@ -0,0 +1,88 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+
+ENCODINGS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def encode_annotated(bgr, image_format="jpeg", quality=80, max_side=0):
+    """
+    Downscale a BGR frame so its long side is at most max_side (0 keeps the
+    size) and encode it. Returns (bytes, media_type), or (None, None) on failure.
+    """
+    extension, media_type, quality_flag = ENCODINGS[image_format]
+    height, width = bgr.shape[:2]
+    if max_side and max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        bgr = cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+    success, encoded = cv2.imencode(extension, bgr, [quality_flag, int(quality)])
+    if not success:
+        return None, None
+    return encoded.tobytes(), media_type
+
+
+class AnnotatedImageStore:
+    """
+    Short-lived in-memory store for encoded annotated images, so a
+    /hand_analysis response can link to the image instead of inlining it.
+    Entries expire after ttl_seconds and the oldest are evicted past max_entries.
+    """
+
+    def __init__(self, max_entries=64, ttl_seconds=120):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.served = 0
+        self.expired = 0
+
+    def put(self, data, media_type):
+        """Store an encoded image and return its id"""
+        image_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._entries[image_id] = (data, media_type, now + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.expired += 1
+            self.stored += 1
+        return image_id
+
+    def get(self, image_id):
+        """(bytes, media_type) for a live id, or None if unknown or expired"""
+        with self._lock:
+            self._prune(time.monotonic())
+            entry = self._entries.get(image_id)
+            if entry is None:
+                return None
+            self.served += 1
+            return entry[0], entry[1]
+
+    def _prune(self, now):
+        while self._entries:
+            image_id, (_, _, expires) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[image_id]
+            self.expired += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(data) for data, _, _ in self._entries.values()),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stored": self.stored,
+                "served": self.served,
+                "expired": self.expired,
+            }
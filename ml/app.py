@@ -1,35 +1,185 @@
-from fastapi import FastAPI, UploadFile, File,Query, HTTPException
+from fastapi import FastAPI, UploadFile, File,Query, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import uvicorn
 import numpy as np
-import tensorflow as tf
-from PIL import Image
 import cv2
-import mediapipe as mp
-from pydantic import BaseModel, Field
-from google import genai 
+from pydantic import BaseModel
 from dotenv import load_dotenv
-import json # To parse the Gemini output
 import sys # For error logging
 import os
-import io
 import base64
+import asyncio
+import time
+import json
+import itertools
+import zipfile
+import tempfile
+from collections import deque
+from contextlib import aclosing
+from typing import Literal
+
+from labels import IMG_SIZE, class_names
+from preprocessing import decode_rgb, model_input, to_bgr
+from backends import load_backend, warm_batch_sizes
+from batching import InferenceBatcher
+from hands_pool import HandsPool
+from executor import BoundedExecutor, QueueFullError
+from admission import AdmissionController, charge
+from live import LiveSession, decode_message, landmarks_to_list
+from hand_geometry import (FINGER_NAMES, JOINT_NAMES, finger_confidences, hands_array,
+                           joint_angles, landmark_features)
+from landmark_classifier import LandmarkClassifier
+from pose_index import PoseIndex
+from result_cache import ResultCache, content_key, perceptual_hash, request_scope
+from batch_inputs import detach_uploads, iter_upload_images
+from lifecycle import Lifecycle
+from roi_tracking import RoiSessionStore
+from video import MudraTimeline, iter_sampled_frames, sampled_frame_interval, video_info
+from metrics import HANDS_PER_IMAGE, REQUESTS, REQUEST_SECONDS, begin_request_timings, registry, server_timing_header, stage, timed
+from annotated_images import ENCODINGS, AnnotatedImageStore, encode_annotated
+from mudra_info import (MudraDetails, GeminiUnavailableError, fallback_details, init_client, open_cache,
+                        open_fetcher, warm_cache)
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Gemini client initialization
-try:
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-    GEMINI_MODEL = "gemini-2.5-flash"
-except Exception as e:
-    print(f"Warning: Could not initialize Gemini client. Ensure API key is set. Error: {e}", file=sys.stderr)
-    client = None
+# Persistent cache for Gemini mudra details (see mudra_info.py)
+info_cache = open_cache()
+# Async Gemini calls with timeouts, a concurrency cap and optional hedging
+gemini_fetcher = open_fetcher()
+MUDRA_INFO_WARMUP = os.getenv("MUDRA_INFO_WARMUP", "false").lower() in ("1", "true", "yes")
 
 # App initialization
 app = FastAPI()
 
+# Heavy components (TensorFlow model, MediaPipe, Gemini client) are loaded in
+# parallel on background threads at startup; see register_components()
+lifecycle = Lifecycle()
+
+# Endpoints that need the model and detectors; they answer 503 until warm
+READY_PATHS = ("/predict", "/predict_batch", "/hand_analysis", "/video_analysis")
+
+# Admission control (see admission.py): every client gets ADMISSION_RATE
+# tokens per second up to ADMISSION_BURST. Requests cost their endpoint's
+# weight up front; annotation, each classified hand, Gemini calls, batch images
+# and video frames are billed on top. Past ADMISSION_SHED_START worker queue
+# fill, the heaviest clients are shed first, and a client below half its burst
+# may only hold ADMISSION_HEAVY_SLOTS worker-bound requests at a time, leaving
+# the other workers to everyone else. Registered before the upload-size and
+# readiness checks so it runs after them: 413 and 503 replies cost nothing
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "10"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "40"))
+ADMISSION_SHED_START = float(os.getenv("ADMISSION_SHED_START", "0.5"))
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+ADMISSION_HEAVY_SLOTS = int(os.getenv("ADMISSION_HEAVY_SLOTS", "2"))
+# Behind a reverse proxy, identify clients by the first X-Forwarded-For address
+ADMISSION_TRUST_FORWARDED = os.getenv("ADMISSION_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+ADMISSION_COSTS = {
+    "/predict": 1.0,
+    "/predict_batch": 2.0,
+    "/hand_analysis": 2.0,
+    "/video_analysis": 10.0,
+    "/mudra_info": 0.5,
+    "/mudra_info/stream": 0.5,
+}
+ANNOTATION_COST = 2.0
+HAND_COST = 1.0
+GEMINI_COST = 5.0
+BATCH_IMAGE_COST = 1.0
+VIDEO_FRAME_COST = 0.2
+
+def worker_load():
+    """Fraction of the worker pool's running + queued capacity in use"""
+    pool = worker_pool.stats()
+    return (pool["running"] + pool["queued"]) / (pool["max_workers"] + pool["max_queue"])
+
+admission = AdmissionController(ADMISSION_RATE, ADMISSION_BURST, ADMISSION_SHED_START, ADMISSION_MAX_CLIENTS,
+                                load=worker_load, enabled=ADMISSION_ENABLED, heavy_slots=ADMISSION_HEAVY_SLOTS)
+
+def client_id(request):
+    if ADMISSION_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def request_cost(request):
+    cost = ADMISSION_COSTS[request.url.path]
+    params = request.query_params
+    if params.get("annotation") in ("inline", "url") or (
+            params.get("annotation") is None and params.get("include_annotated_image", "").lower() in ("1", "true")):
+        cost += ANNOTATION_COST
+    return cost
+
+@app.middleware("http")
+async def admit_request(request, call_next):
+    """Rate-limit per client (429) and shed worker-pool load (503), both with Retry-After"""
+    path = request.url.path
+    if path not in ADMISSION_COSTS:
+        return await call_next(request)
+    rejected = admission.admit(client_id(request), request_cost(request), shed=path in READY_PATHS)
+    if rejected is not None:
+        status_code, retry_after = rejected
+        detail = "Rate limit exceeded" if status_code == 429 else "Server is busy"
+        return JSONResponse(
+            status_code=status_code,
+            content={"detail": f"{detail}, please retry in {retry_after} s."},
+            headers={"Retry-After": str(retry_after)},
+        )
+    started = time.perf_counter()
+    try:
+        # Streamed responses (/predict_batch) count as finished once their headers are out
+        return await call_next(request)
+    finally:
+        admission.finish(time.perf_counter() - started)
+
+# Upload ingestion limits: uploads above MAX_UPLOAD_MB are rejected with 413
+# and frames larger than MAX_DECODE_SIDE are decoded at reduced resolution
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "15"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+MAX_DECODE_SIDE = int(os.getenv("MAX_DECODE_SIDE", "1280"))
+SINGLE_UPLOAD_PATHS = ("/predict", "/hand_analysis")
+
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    """Reject oversized single-image uploads from Content-Length before the body is parsed"""
+    if request.url.path in SINGLE_UPLOAD_PATHS:
+        length = request.headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds {MAX_UPLOAD_MB:g} MB limit."})
+    return await call_next(request)
+
+@app.middleware("http")
+async def require_ready(request, call_next):
+    if request.url.path in READY_PATHS and not lifecycle.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is starting up, please retry shortly."},
+            headers={"Retry-After": "5"},
+        )
+    return await call_next(request)
+
+# Request counts and latency for /metrics; SERVER_TIMING=true also returns
+# the per-stage breakdown of each request in a Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+@app.middleware("http")
+async def record_request(request, call_next):
+    timings = begin_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    route = getattr(route, "path", "unmatched")
+    REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    REQUEST_SECONDS.observe(elapsed, route=route)
+    if SERVER_TIMING:
+        timings.append(("total", elapsed))
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
 # Allow React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -39,241 +189,877 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load the ML model
-model = tf.keras.models.load_model("best_mudra_model.keras")
-IMG_SIZE = (128, 128)
-class_names = ['Alapadmam', 'Anjali', 'Aralam', 'Ardhachandran', 'Ardhapathaka',
-               'Berunda', 'Bramaram', 'Chakra', 'Chandrakala', 'Chaturam',
-               'Garuda', 'Hamsapaksha', 'Hamsasyam', 'Kangulam', 'Kapith',
-               'Kapotham', 'Karkatta', 'Kartariswastika', 'Kartrimukha', 'Katakamukha',
-               'Katakavardhana', 'Katrimukha', 'Khatva', 'Kilaka', 'Kurma',
-               'Matsya', 'Mayura', 'Mrigasirsha', 'Mukulam', 'Mushti',
-               'Nagabandha', 'Padmakosha', 'Pasha', 'Pathaka', 'Pushpaputa',
-               'Sakata', 'Samputa', 'Sandamsha', 'Sarpasirsha', 'Shanka',
-               'Shivalinga', 'Shukatundam', 'Sikharam', 'Simhamukham', 'Suchi',
-               'Swastikam', 'Tamarachudam', 'Tripathaka', 'Trishulam', 'Varaha']
-
-# MediaPipe hands setup
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-
-# Pydantic Model for Structured Gemini Output ---
-
-# Define the data structure we want Gemini to return
-class MudraDetails(BaseModel):
-    meaning: str = Field(description="A single paragraph explanation of the mudra's meaning and cultural significance.")
-    innerThought: str = Field(description="A short, concise phrase representing the emotion or concept associated with the mudra.")
-    commonMistakes: list[str] = Field(description="A list of 3 common mistakes beginners make when performing this mudra.")
+# Load the ML model. INFERENCE_BACKEND=tflite serves an export from
+# export_tflite.py through the lightweight interpreter instead of Keras
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+MODEL_PATH = os.getenv("MODEL_PATH", "best_mudra_model.keras")
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH", "best_mudra_model.tflite")
+# INFERENCE_BACKEND=remote (set by serve.py) sends batches to a shared model
+# server process; TF_*_OP_THREADS cap TensorFlow's thread pools in-process
+MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS", "/tmp/mudra-model-0.sock")
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", "0")) or None
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "0")) or None
+# Keras forward pass: a tf.function traced once at startup (TF_FUNCTION=false
+# falls back to model.predict), optionally XLA-compiled
+TF_FUNCTION = os.getenv("TF_FUNCTION", "true").lower() in ("1", "true", "yes")
+TF_XLA = os.getenv("TF_XLA", "false").lower() in ("1", "true", "yes")
+inference_backend = None
+
+# Shared micro-batching scheduler: concurrent single-image calls from every
+# endpoint are grouped into one forward pass per batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+batcher = None
+
+def load_model():
+    global inference_backend, batcher
+    inference_backend = load_backend(
+        INFERENCE_BACKEND, MODEL_PATH, TFLITE_MODEL_PATH,
+        num_threads=TF_INTRA_OP_THREADS,
+        inter_op_threads=TF_INTER_OP_THREADS,
+        server_address=MODEL_SERVER_ADDRESS,
+        max_batch_size=BATCH_MAX_SIZE,
+        compiled=TF_FUNCTION,
+        jit_compile=TF_XLA,
+    )
+    batcher = InferenceBatcher(
+        timed(inference_backend.predict, "model_forward"),
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+    )
+    return inference_backend
+
+def warm_model(backend):
+    """Run every batch shape the batcher can produce (see warm_batch_sizes) before traffic arrives"""
+    for size in warm_batch_sizes(BATCH_MAX_SIZE):
+        backend.predict(np.zeros((size, *IMG_SIZE, 3), dtype=np.float32))
+
+# Optional landmark-geometry classifier (see train_landmark_classifier.py).
+# Requests choose classifier=cnn|landmark|combined; "combined" blends the two
+# probability vectors with LANDMARK_WEIGHT on the landmark side
+LANDMARK_MODEL_PATH = os.getenv("LANDMARK_MODEL_PATH", "landmark_classifier.npz")
+LANDMARK_WEIGHT = float(os.getenv("LANDMARK_WEIGHT", "0.5"))
+landmark_classifier = None
+
+def load_landmark_classifier():
+    global landmark_classifier
+    try:
+        landmark_classifier = LandmarkClassifier.load(LANDMARK_MODEL_PATH, class_names)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Landmark classifier not loaded, only the CNN is available. Error: {e}")
+    return landmark_classifier
+
+# Optional reference pose index for assessment scoring (see build_pose_index.py);
+# /hand_analysis?target=<mudra> compares each hand with that mudra's references
+POSE_INDEX_PATH = os.getenv("POSE_INDEX_PATH", "pose_index.npy")
+POSE_TOLERANCE_DEG = float(os.getenv("POSE_TOLERANCE_DEG", "25"))
+pose_index = None
+
+def load_pose_index():
+    global pose_index
+    try:
+        pose_index = PoseIndex.load(POSE_INDEX_PATH, class_names, tolerance_deg=POSE_TOLERANCE_DEG)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Pose index not loaded, target scoring is unavailable. Error: {e}")
+    return pose_index
+
+# LRU cache of /predict and /hand_analysis responses keyed by the uploaded
+# bytes; RESULT_CACHE_NEAR_DUPLICATES also matches re-encoded copies of a frame
+RESULT_CACHE_ENTRIES = int(os.getenv("RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+RESULT_CACHE_NEAR_DUPLICATES = os.getenv("RESULT_CACHE_NEAR_DUPLICATES", "false").lower() in ("1", "true", "yes")
+RESULT_CACHE_MAX_DISTANCE = int(os.getenv("RESULT_CACHE_MAX_DISTANCE", "4"))
+result_cache = ResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_MAX_MB * 1024 * 1024)
+
+# Per-image size limit for /predict_batch uploads and zip members
+PREDICT_BATCH_MAX_IMAGE_MB = float(os.getenv("PREDICT_BATCH_MAX_IMAGE_MB", "20"))
+
+# Annotated /hand_analysis images: encoding, size and how long linked images are kept
+ANNOTATED_IMAGE_FORMAT = os.getenv("ANNOTATED_IMAGE_FORMAT", "jpeg").lower()
+if ANNOTATED_IMAGE_FORMAT not in ENCODINGS:
+    print(f"Unknown ANNOTATED_IMAGE_FORMAT {ANNOTATED_IMAGE_FORMAT!r}, using jpeg", file=sys.stderr)
+    ANNOTATED_IMAGE_FORMAT = "jpeg"
+ANNOTATED_IMAGE_QUALITY = int(os.getenv("ANNOTATED_IMAGE_QUALITY", "80"))
+ANNOTATED_IMAGE_MAX_SIDE = int(os.getenv("ANNOTATED_IMAGE_MAX_SIDE", "960"))
+annotated_images = AnnotatedImageStore(
+    max_entries=int(os.getenv("ANNOTATED_IMAGE_STORE_ENTRIES", "64")),
+    ttl_seconds=float(os.getenv("ANNOTATED_IMAGE_TTL_SECONDS", "120")),
+)
+
+# MediaPipe hands setup (imported by load_hands() at startup)
+mp_hands = None
+mp_drawing = None
+
+# Bounded worker pool for decoding, detection and encoding so the event loop
+# stays responsive; requests beyond WORKER_QUEUE_LIMIT are rejected with a 503
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", str(min(4, os.cpu_count() or 1))))
+WORKER_QUEUE_LIMIT = int(os.getenv("WORKER_QUEUE_LIMIT", "32"))
+worker_pool = BoundedExecutor(max_workers=WORKER_THREADS, max_queue=WORKER_QUEUE_LIMIT)
+
+registry.gauge("mudra_ready", "1 once every required component is loaded and warm", lambda: int(lifecycle.ready))
+registry.gauge("mudra_worker_running", "Jobs running on the worker pool", lambda: worker_pool.stats()["running"])
+registry.gauge("mudra_worker_queued", "Jobs waiting for a worker", lambda: worker_pool.stats()["queued"])
+registry.gauge("mudra_batch_pending", "Images waiting for the inference batcher",
+               lambda: batcher.stats()["pending"] if batcher else None)
+registry.gauge("mudra_batch_avg_size", "Average images per model forward pass",
+               lambda: batcher.stats()["avg_batch_size"] if batcher else None)
+
+# Pre-initialized static-image detectors, one per worker thread by default
+HANDS_POOL_SIZE = int(os.getenv("HANDS_POOL_SIZE", str(WORKER_THREADS)))
+hands_pool = None
+
+def load_hands():
+    global mp_hands, mp_drawing, hands_pool
+    import mediapipe as mp
+    mp_hands = mp.solutions.hands
+    mp_drawing = mp.solutions.drawing_utils
+    hands_pool = HandsPool(
+        lambda: mp_hands.Hands(
+            static_image_mode=True,
+            max_num_hands=2,
+            min_detection_confidence=0.6
+        ),
+        size=HANDS_POOL_SIZE,
+        warmup=False,
+    )
+    return hands_pool
 
+# Pydantic response models
 class HandAnalysisResponse(BaseModel):
     num_hands: int
     finger_confidence: dict
+    joint_angles: dict
     mudra_predictions: list
-    annotated_image: str = None  # base64 encoded image
+    annotated_image: str = None  # base64 encoded image (annotation=inline)
+    annotated_image_url: str = None  # GET this for the image bytes (annotation=url)
+    annotated_image_type: str = None  # media type of the annotated image
+    landmarks: dict = None  # normalized landmark coordinates (annotation=landmarks)
+    image_size: dict = None  # analyzed frame size, to scale the landmarks
 
 # Utility Functions
-def finger_angle(p1, p2, p3):
-    """Return angle (in degrees) at p2 formed by p1–p2–p3"""
-    a = np.array(p1)
-    b = np.array(p2)
-    c = np.array(p3)
-    ba = a - b
-    bc = c - b
-    cos_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
-
-def angle_to_conf(angle, finger_name='default'):
-    if finger_name == 'Thumb':
-        return max(0, min(100, (angle - 40) / (160 - 40) * 100))
-    else:
-        return max(0, min(100, (angle - 60) / (180 - 60) * 100))
-    
-def image_to_base64(image_array):
-    """Convert numpy image array to base64 string"""
-    success, encoded_image = cv2.imencode('.jpg', image_array)
-    if success:
-        return base64.b64encode(encoded_image).decode('utf-8')
-    return None
+def top_predictions(probs, k=3):
+    """Return the top-k classes of a probability row, highest first"""
+    top_indices = np.argsort(probs)[-k:][::-1]
+    return [{"class": class_names[i], "probability": float(probs[i])} for i in top_indices]
+
+async def run_in_worker(fn, *args):
+    """Run CPU-bound work on the bounded worker pool, shedding load when it is full"""
+    try:
+        return await worker_pool.run(fn, *args)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+def encode_annotated_frame(image_array):
+    """Downscale and encode an annotated BGR frame with the configured format and quality"""
+    return encode_annotated(image_array, ANNOTATED_IMAGE_FORMAT, ANNOTATED_IMAGE_QUALITY, ANNOTATED_IMAGE_MAX_SIDE)
+
+def near_duplicate_cached(endpoint, options, contents, fn, *args):
+    """Serve fn(*args) from a perceptually similar earlier upload when enabled (runs on a worker thread)"""
+    phash = perceptual_hash(contents) if RESULT_CACHE_NEAR_DUPLICATES else None
+    if phash is None:
+        return fn(*args)
+    scope = request_scope(endpoint, options)
+    cached = result_cache.get_similar(scope, phash, RESULT_CACHE_MAX_DISTANCE)
+    if cached is not None:
+        return cached
+    result = fn(*args)
+    result_cache.put((scope, phash), result)
+    return result
+
+async def cached_in_worker(endpoint, options, contents, fn, *args):
+    """Return a cached response for identical uploads, otherwise compute it on the worker pool"""
+    if not result_cache.enabled:
+        return await run_in_worker(fn, *args)
+    key = content_key(endpoint, contents, options)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+    result = await run_in_worker(near_duplicate_cached, endpoint, options, contents, fn, *args)
+    result_cache.put(key, result)
+    return result
+
+async def read_upload(file):
+    """Read an uploaded file in chunks, failing with 413 as soon as it exceeds MAX_UPLOAD_BYTES"""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_MB:g} MB limit.")
+    contents = bytearray()
+    while chunk := await file.read(1024 * 1024):
+        contents += chunk
+        if len(contents) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_MB:g} MB limit.")
+    return contents
 
 # FastAPI Endpoints
+def preprocess_for_model(contents):
+    """Decode image bytes and resize them into the model's RGB input array"""
+    # The whole image is squeezed to IMG_SIZE, so decode no larger than needed
+    rgb = decode_rgb(contents, max(IMG_SIZE))
+    if rgb is None:
+        raise ValueError("Invalid image file")
+    return model_input(rgb)
+
+def predict_from_bytes(contents):
+    """Decode, resize and classify an uploaded image (runs on a worker thread)"""
+    try:
+        with stage("decode"):
+            img_array = preprocess_for_model(contents)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with stage("inference"):
+        preds = batcher.predict(img_array)
+    return {"predictions": top_predictions(preds)}
+
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
     """Simple mudra prediction from image"""
-    image = Image.open(file.file).convert("RGB")
-    image = image.resize(IMG_SIZE)
-    img_array = tf.keras.preprocessing.image.img_to_array(image)
-    img_array = np.expand_dims(img_array, axis=0)
+    contents = await read_upload(file)
+    return await cached_in_worker("predict", {}, contents, predict_from_bytes, contents)
+
+async def stream_batch_predictions(uploads, top_k):
+    """
+    Yield one NDJSON line per image, decoding BATCH_MAX_SIZE images at a time
+    and queueing each decoded chunk on the batcher together. Only one chunk is
+    held in memory, regardless of how many images the request contains.
+    """
+    max_image_bytes = int(PREDICT_BATCH_MAX_IMAGE_MB * 1024 * 1024)
+    # Use at most WORKER_THREADS workers so one batch cannot starve other requests
+    decode_slots = asyncio.Semaphore(WORKER_THREADS)
+    count = errors = 0
+
+    async def decode(loader):
+        async with decode_slots:
+            while True:
+                try:
+                    return await worker_pool.run(lambda: preprocess_for_model(loader()))
+                except QueueFullError:
+                    await asyncio.sleep(0.05)
+
+    try:
+        images = iter_upload_images(uploads, max_image_bytes)
+        while True:
+            try:
+                chunk = list(itertools.islice(images, BATCH_MAX_SIZE))
+            except zipfile.BadZipFile as e:
+                errors += 1
+                yield json.dumps({"error": f"Invalid zip archive: {e}"}) + "\n"
+                break
+            if not chunk:
+                break
 
-    preds = model.predict(img_array)
-    top3_indices = np.argsort(preds[0])[-3:][::-1]
+            decoded = await asyncio.gather(*(decode(loader) for _, loader in chunk), return_exceptions=True)
+            pending = [item if isinstance(item, Exception) else batcher.submit(item) for item in decoded]
 
-    results = [{"class": class_names[i], "probability": float(preds[0][i])} for i in top3_indices]
-    return {"predictions": results}
+            charge(BATCH_IMAGE_COST * len(chunk))
+            for (name, _), item in zip(chunk, pending):
+                line = {"index": count, "file": name}
+                try:
+                    if isinstance(item, Exception):
+                        raise item
+                    # Shielded: a client disconnect must not cancel the batcher's future
+                    line["predictions"] = top_predictions(await asyncio.shield(asyncio.wrap_future(item)), top_k)
+                except Exception as e:
+                    errors += 1
+                    line["error"] = str(e)
+                count += 1
+                yield json.dumps(line) + "\n"
+
+        yield json.dumps({"done": True, "count": count, "errors": errors}) + "\n"
+    finally:
+        for upload in uploads:
+            upload.file.close()
+
+@app.post("/predict_batch")
+async def predict_batch(
+    files: list[UploadFile] = File(...),
+    top_k: int = Query(3, ge=1, le=len(class_names)),
+):
+    """
+    Classify many images in one request. Accepts several image files and/or
+    zip archives and streams newline-delimited JSON: one line per image with
+    its top-k predictions (or an error), then a summary line.
+    """
+    uploads = await asyncio.to_thread(detach_uploads, files)
+    return StreamingResponse(stream_batch_predictions(uploads, top_k), media_type="application/x-ndjson")
 
 @app.get("/mudra_info", response_model=MudraDetails)
 async def get_mudra_details(mudra_name: str = Query(..., title="Mudra Name")):
     """
     Queries the Gemini API for descriptive details about a given Mudra name.
-    The response is forced into the MudraDetails JSON structure.
+    Answers are served from the persistent cache when available; concurrent
+    misses for the same name share one Gemini call.
+    """
+    async def load():
+        charge(GEMINI_COST)
+        details = await gemini_fetcher.fetch(mudra_name)
+        return details.model_dump()
+
+    try:
+        return MudraDetails(**await info_cache.get_or_fetch(mudra_name, load))
+    except GeminiUnavailableError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        print(f"Error calling Gemini API for {mudra_name}: {e}", file=sys.stderr)
+        # Return a fallback response
+        return fallback_details(mudra_name)
+
+async def stream_mudra_info(mudra_name):
+    """NDJSON lines for /mudra_info/stream"""
+    def line(**event):
+        return json.dumps(event) + "\n"
+
+    data = info_cache.lookup(mudra_name)
+    if data is not None:
+        for field, value in data.items():
+            yield line(field=field, value=value)
+        yield line(done=True, cached=True, details=data)
+        return
+
+    try:
+        while True:
+            pending, owner = info_cache.claim(mudra_name)
+            if owner:
+                break
+            # Another request is already fetching this mudra; relay its answer,
+            # or fetch it here if that request went away first
+            data = await info_cache.wait(pending)
+            if data is not None:
+                for field, value in data.items():
+                    yield line(field=field, value=value)
+                yield line(done=True, cached=False, details=data)
+                return
+
+        charge(GEMINI_COST)
+        fields = {}
+        try:
+            async with aclosing(gemini_fetcher.stream(mudra_name)) as members:
+                async for field, value in members:
+                    fields[field] = value
+                    yield line(field=field, value=value)
+            data = MudraDetails(**fields).model_dump()
+        except BaseException as e:
+            info_cache.resolve(mudra_name, error=e)
+            raise
+        info_cache.resolve(mudra_name, data)
+    except GeminiUnavailableError as e:
+        yield line(done=True, error=str(e))
+        return
+    except Exception as e:
+        print(f"Error streaming Gemini details for {mudra_name}: {e}", file=sys.stderr)
+        yield line(done=True, cached=False, fallback=True, details=fallback_details(mudra_name).model_dump())
+        return
+    yield line(done=True, cached=False, details=data)
+
+@app.get("/mudra_info/stream")
+async def stream_mudra_details(mudra_name: str = Query(..., title="Mudra Name")):
+    """
+    Streaming /mudra_info. Newline-delimited JSON: one {"field", "value"} line
+    per MudraDetails field as soon as Gemini has generated it, then a
+    {"done": true, "details": {...}} line with the validated object, which
+    clients should treat as final. Cached answers are replayed at once.
+    """
+    return StreamingResponse(stream_mudra_info(mudra_name), media_type="application/x-ndjson")
+
+# classifier=cascade: the landmark model answers when its top-1 probability
+# beats the runner-up by CASCADE_MARGIN, otherwise the hand escalates to the CNN
+CASCADE_MARGIN = float(os.getenv("CASCADE_MARGIN", "0.3"))
+CASCADE_STAGES = registry.counter("mudra_cascade_hands_total", "Cascade hands by answering stage", ("stage",))
+
+def cascade_escalates(landmark_probs):
+    """True when the landmark stage is not confident enough and the CNN must run"""
+    second, first = np.partition(landmark_probs, -2)[-2:]
+    escalate = first - second < CASCADE_MARGIN
+    CASCADE_STAGES.inc(stage="cnn" if escalate else "landmark")
+    return escalate
+
+def prediction_plan(classifier, landmark_probs):
+    """
+    (run_cnn, landmark_probs_to_use, stage) for one hand: which classifier
+    stage answers it given the request's classifier setting.
+    """
+    if classifier == "cnn":
+        return True, None, "cnn"
+    if classifier == "landmark":
+        return False, landmark_probs, "landmark"
+    if classifier == "combined":
+        return True, landmark_probs, "combined"
+    if cascade_escalates(landmark_probs):
+        return True, None, "cnn"
+    return False, landmark_probs, "landmark"
+
+def check_classifier(classifier):
+    """Reject landmark-based classification when no landmark model is loaded"""
+    if classifier != "cnn" and landmark_classifier is None:
+        raise HTTPException(status_code=400, detail="Landmark classifier is not available on this server.")
+
+def check_target(target):
+    """Reject pose scoring for unknown mudras, mudras without reference poses, or when no pose index is loaded"""
+    if target is None:
+        return
+    if target not in class_names:
+        raise HTTPException(status_code=400, detail=f"Unknown mudra '{target}'.")
+    if pose_index is None:
+        raise HTTPException(status_code=400, detail="Pose scoring is not available on this server.")
+    if pose_index.reference_counts()[class_names.index(target)] == 0:
+        raise HTTPException(status_code=400, detail=f"No reference poses for '{target}' in the pose index.")
+
+def hand_box(hand_points, w, h, padding=20):
+    """Padded (x1, y1, x2, y2) pixel box around one hand's (21, 3) landmark points"""
+    pixels = hand_points[:, :2].astype(int)
+    x1, y1 = pixels.min(axis=0)
+    x2, y2 = pixels.max(axis=0)
+    return max(0, int(x1) - padding), max(0, int(y1) - padding), min(w, int(x2) + padding), min(h, int(y2) + padding)
+
+def resolve_prediction(future, landmark_probs):
+    """Wait for a hand's CNN probabilities (if queued) and blend them with the landmark prediction"""
+    if future is None:
+        return landmark_probs
+    with stage("inference"):
+        cnn_probs = future.result()
+    if landmark_probs is None:
+        return cnn_probs
+    return (1 - LANDMARK_WEIGHT) * cnn_probs + LANDMARK_WEIGHT * landmark_probs
+
+def analyze_hands(frame, multi_hand_landmarks, annotated_frame=None, multi_handedness=None, classifier="cnn",
+                  target=None):
     """
-    if client is None:
-        return {"error": "Gemini client not initialized. Check API key setup."}
-
-    # 1. Construct the detailed prompt
-    prompt = f"""
-    You are an expert in classical Indian dance (Bharatanatyam/Kathak). 
-    Provide the cultural meaning, associated inner thought/emotion, and a list of 3 common beginner mistakes for the hand gesture (Mudra) called **{mudra_name}**.
-    Your output MUST strictly follow the requested JSON schema.
+    Score fingers and classify every detected hand of an RGB frame.
+    Landmarks and labels are drawn onto annotated_frame (BGR) when one is given.
+    classifier selects the CNN on the hand crop, the landmark-geometry model, a blend of
+    both, or a cascade that only runs the CNN when the landmark model is unsure.
+    With a target mudra, every hand is also scored against its reference poses.
     """
+    h, w, _ = frame.shape
+
+    # Initialize response data
+    num_hands = len(multi_hand_landmarks) if multi_hand_landmarks else 0
+    HANDS_PER_IMAGE.observe(num_hands)
+    charge(HAND_COST * num_hands)
+    all_finger_confidence = {}
+    all_joint_angles = {}
+    all_mudra_predictions = []
+    pending_predictions = []
+
+    with stage("landmarks"):
+        # Every joint angle of every hand in one vectorized pass
+        points = hands_array(multi_hand_landmarks, w, h)
+        angles = joint_angles(points)
+        finger_scores = finger_confidences(angles)
+
+        # Landmark-geometry prediction and pose scoring need no pixels, only the 21 points per hand
+        is_left = [hand.classification[0].label == "Left" for hand in multi_handedness] if multi_handedness else False
+        landmark_probs = [None] * num_hands
+        if classifier != "cnn" and num_hands:
+            landmark_probs = landmark_classifier.predict(landmark_features(points, is_left))
+        pose_scores = pose_index.score(points, target, is_left) if target is not None and num_hands else []
+
+    for hand_no in range(num_hands):
+        # Draw landmarks on annotated image
+        if annotated_frame is not None:
+            with stage("draw"):
+                mp_drawing.draw_landmarks(
+                    annotated_frame, 
+                    multi_hand_landmarks[hand_no], 
+                    mp_hands.HAND_CONNECTIONS
+                )
+
+        all_finger_confidence[f"hand_{hand_no + 1}"] = {
+            name: float(score) for name, score in zip(FINGER_NAMES, finger_scores[hand_no])
+        }
+        all_joint_angles[f"hand_{hand_no + 1}"] = {
+            name: round(float(angle), 2) for name, angle in zip(JOINT_NAMES, angles[hand_no])
+        }
 
-    # 2. Define the response configuration to force JSON output
-    # We use the schema generated from the Pydantic model MudraDetails
-    response_schema = MudraDetails.model_json_schema()
+        # Mudra prediction for this hand
+        x1, y1, x2, y2 = hand_box(points[hand_no], w, h)
 
-    config = {
-        "response_mime_type": "application/json",
-        "response_schema": response_schema
+        future = None
+        run_cnn, hand_landmark_probs, answered_by = prediction_plan(classifier, landmark_probs[hand_no])
+        if run_cnn:
+            with stage("crop"):
+                hand_array = model_input(frame, (x1, y1, x2, y2))
+            if hand_array is not None:
+                future = batcher.submit(hand_array)
+        if future is not None or hand_landmark_probs is not None:
+            pending_predictions.append((hand_no, x1, y1, future, hand_landmark_probs, answered_by))
+
+    # All hands of this image are queued together so they share a batch
+    for hand_no, x1, y1, future, landmark_probs, answered_by in pending_predictions:
+        pred = resolve_prediction(future, landmark_probs)
+        hand_predictions = []
+        for p in top_predictions(pred):
+            p["confidence"] = p["probability"] * 100
+            hand_predictions.append(p)
+
+        all_mudra_predictions.append({"hand_number": hand_no + 1, "stage": answered_by, "predictions": hand_predictions})
+
+        # Add label to annotated image
+        if annotated_frame is not None and hand_predictions:
+            top_pred = hand_predictions[0]
+            label = f"Hand {hand_no+1}: {top_pred['class']} ({top_pred['confidence']:.1f}%)"
+            with stage("draw"):
+                cv2.putText(annotated_frame, label, (x1, y1-10),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    response_data = {
+        "num_hands": num_hands,
+        "finger_confidence": all_finger_confidence,
+        "joint_angles": all_joint_angles,
+        "mudra_predictions": all_mudra_predictions
     }
+    if target is not None:
+        response_data["pose_assessment"] = [
+            {"hand_number": hand_no + 1, **score} for hand_no, score in enumerate(pose_scores)
+        ]
+    return response_data
+
+def detect_full_frame(frame):
+    """Palm detection plus landmarks over the whole RGB frame on a pooled detector"""
+    with hands_pool.checkout() as hands:
+        return hands.process(frame)
 
+def analyze_hand_image(contents, annotation="none", classifier="cnn", session_id=None, target=None):
+    """
+    Decode an uploaded image and run the full hand analysis (runs on a worker thread).
+    annotation: "inline" base64-embeds the annotated image, "url" stores it for
+    GET /annotated_images/{id}, "landmarks" returns coordinates to draw client-side.
+    With a session_id, detection reuses that session's previous hand ROI when possible.
+    target scores each hand against that mudra's reference poses.
+    """
     try:
-        # 3. Call the Gemini API with structured output configuration
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=[prompt],
-            config=config
-        )
-        
-        # 4. Parse the JSON response text
-        # The result.text is guaranteed to be a JSON string matching the schema
-        gemini_json_str = response.text.strip()
-        details_data = json.loads(gemini_json_str)
+        # Decode once; MediaPipe and the model both consume the RGB frame
+        with stage("decode"):
+            frame = decode_rgb(contents, MAX_DECODE_SIDE)
+        if frame is None:
+            raise HTTPException(status_code=400, detail="Invalid image file")
 
-        # 5. Return the validated Pydantic model
-        return MudraDetails(**details_data)
+        # Run detection on a pooled MediaPipe hands instance, or only inside
+        # the previous frame's hand ROI for a session
+        detection = None
+        with stage("detect"):
+            if session_id:
+                session = roi_sessions.get(session_id)
+                with session.lock:
+                    results, detection = session.process(frame, detect_full_frame)
+                    frames_since_detection = session.frames_since_detection
+                DETECTIONS.inc(mode=detection)
+            else:
+                results = detect_full_frame(frame)
+
+        # Only pay for a full-frame copy when the server draws the annotated image
+        draw = annotation in ("inline", "url")
+        with stage("draw"):
+            annotated_frame = to_bgr(frame, copy=True) if draw else None
+        response_data = analyze_hands(frame, results.multi_hand_landmarks, annotated_frame,
+                                      results.multi_handedness, classifier, target)
+
+        # Include annotated image if requested
+        if annotated_frame is not None:
+            with stage("encode"):
+                data, media_type = encode_annotated_frame(annotated_frame)
+            if data is not None:
+                response_data["annotated_image_type"] = media_type
+                if annotation == "inline":
+                    response_data["annotated_image"] = base64.b64encode(data).decode('utf-8')
+                else:
+                    response_data["annotated_image_url"] = f"/annotated_images/{annotated_images.put(data, media_type)}"
+        elif annotation == "landmarks":
+            height, width = frame.shape[:2]
+            response_data["landmarks"] = landmarks_to_list(results.multi_hand_landmarks)
+            response_data["image_size"] = {"width": width, "height": height}
+
+        if detection is not None:
+            response_data["detection"] = {"mode": detection, "frames_since_detection": frames_since_detection}
+        return response_data
 
     except Exception as e:
-        print(f"Error calling Gemini API for {mudra_name}: {e}", file=sys.stderr)
-        # Return a fallback response
-        return MudraDetails(
-            meaning="Details unavailable due to an external service error.",
-            innerThought=f"Could not retrieve details for {mudra_name}.",
-            commonMistakes=["Check server logs for Gemini API error."]
-        )
+        raise HTTPException(status_code=500, detail=f"Error in hand analysis: {str(e)}")
 
 @app.post("/hand_analysis")
-async def hand_analysis(file: UploadFile = File(...), include_annotated_image: bool = False):
+async def hand_analysis(
+    file: UploadFile = File(...),
+    include_annotated_image: bool = False,
+    classifier: Literal["cnn", "landmark", "combined", "cascade"] = "cnn",
+    annotation: Literal["none", "inline", "url", "landmarks"] = None,
+    session_id: str = Query(None, max_length=64),
+    target: str = Query(None, title="Target mudra to score against"),
+):
     """
     Comprehensive hand analysis including:
     - Number of hands detected
     - Finger confidence scores
     - Mudra predictions
-    - Optional annotated image with landmarks
+    - Optional annotated image with landmarks (annotation=inline|url) or just
+      the landmark coordinates (annotation=landmarks);
+      include_annotated_image=true is the same as annotation=inline
+
+    Clients sending consecutive frames (e.g. an assessment webcam loop) can
+    pass a stable session_id: frames then only run landmarking around the
+    previous frame's hands, with periodic full re-detection.
+
+    Assessment clients can pass the mudra being practised as target:
+    pose_assessment then compares each hand with that mudra's reference
+    poses, with per-finger deviations, hints and an overall similarity.
+    """
+    check_classifier(classifier)
+    check_target(target)
+    if annotation is None:
+        annotation = "inline" if include_annotated_image else "none"
+    contents = await read_upload(file)
+    if annotation == "url" or session_id:
+        # Linked images expire and session frames depend on earlier frames,
+        # so these responses are never served from the result cache
+        return await run_in_worker(analyze_hand_image, contents, annotation, classifier, session_id, target)
+    options = {"annotation": annotation, "classifier": classifier, "target": target}
+    return await cached_in_worker("hand_analysis", options, contents,
+                                  analyze_hand_image, contents, annotation, classifier, None, target)
+
+@app.get("/annotated_images/{image_id}")
+async def get_annotated_image(image_id: str):
+    """Encoded annotated image linked from a /hand_analysis?annotation=url response"""
+    entry = annotated_images.get(image_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Annotated image not found or expired")
+    data, media_type = entry
+    return Response(content=data, media_type=media_type, headers={"Cache-Control": "private, max-age=60"})
+
+# Currently connected /ws/live sessions; each holds its own tracking-mode
+# detector, so connections beyond LIVE_SESSIONS_MAX are closed with 1013
+LIVE_SESSIONS_MAX = int(os.getenv("LIVE_SESSIONS_MAX", "16"))
+live_sessions = set()
+live_slots = asyncio.Semaphore(LIVE_SESSIONS_MAX)
+
+def create_tracking_hands():
+    """Video-mode detector for a live session: landmarks are tracked between frames"""
+    return mp_hands.Hands(
+        static_image_mode=False,
+        max_num_hands=2,
+        min_detection_confidence=0.6,
+        min_tracking_confidence=0.5
+    )
+
+# /hand_analysis?session_id=... ROI tracking; each session owns a tracking-mode detector
+ROI_SESSIONS_MAX = int(os.getenv("ROI_SESSIONS_MAX", "16"))
+ROI_SESSION_TTL_SECONDS = float(os.getenv("ROI_SESSION_TTL_SECONDS", "30"))
+ROI_REDETECT_FRAMES = int(os.getenv("ROI_REDETECT_FRAMES", "30"))
+ROI_MIN_CONFIDENCE = float(os.getenv("ROI_MIN_CONFIDENCE", "0.7"))
+roi_sessions = RoiSessionStore(
+    create_tracking_hands,
+    max_sessions=ROI_SESSIONS_MAX,
+    ttl_seconds=ROI_SESSION_TTL_SECONDS,
+    redetect_frames=ROI_REDETECT_FRAMES,
+    min_confidence=ROI_MIN_CONFIDENCE,
+)
+DETECTIONS = registry.counter("mudra_detections_total", "Session frame detections by mode (roi or full)", ("mode",))
+
+def analyze_live_frame(session, contents, classifier="cnn"):
+    """Run tracking detection and classification on one streamed frame (worker thread)"""
+    started = time.perf_counter()
+    with stage("decode"):
+        frame = decode_rgb(contents, MAX_DECODE_SIDE)
+    if frame is None:
+        return {"error": "Invalid image frame"}
+
+    with stage("track"):
+        results = session.hands.process(frame)
+    response_data = analyze_hands(frame, results.multi_hand_landmarks, None, results.multi_handedness, classifier)
+    response_data["landmarks"] = landmarks_to_list(results.multi_hand_landmarks)
+    response_data["processing_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return response_data
+
+@app.websocket("/ws/live")
+async def live_frames(websocket: WebSocket, classifier: Literal["cnn", "landmark", "combined", "cascade"] = "cnn"):
     """
+    Persistent stream for webcam frames. The client sends JPEG frames (binary,
+    or base64/data-URL text) and receives one JSON message per analyzed frame
+    with landmarks, finger confidence and mudra predictions. Frames that arrive
+    while an earlier one is still being processed are dropped in favor of the newest.
+    """
+    await websocket.accept()
+    if not lifecycle.ready:
+        await websocket.close(code=1013, reason="Service is starting up, please retry shortly.")
+        return
+    if classifier != "cnn" and landmark_classifier is None:
+        await websocket.close(code=1008, reason="Landmark classifier is not available on this server.")
+        return
+    if live_slots.locked():
+        await websocket.close(code=1013, reason="Too many live sessions, please retry shortly.")
+        return
+    # Not locked, so this takes a slot without waiting
+    await live_slots.acquire()
     try:
-        # Read and convert image
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Invalid image file")
+        session = LiveSession(await asyncio.to_thread(create_tracking_hands))
+    except BaseException:
+        live_slots.release()
+        raise
+    live_sessions.add(session)
 
-        # Initialize MediaPipe hands
-        with mp_hands.Hands(
-            static_image_mode=True,
-            max_num_hands=2,
-            min_detection_confidence=0.6
-        ) as hands:
-            
-            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(img_rgb)
-            h, w, _ = frame.shape
-
-            # Initialize response data
-            num_hands = len(results.multi_hand_landmarks) if results.multi_hand_landmarks else 0
-            all_finger_confidence = {}
-            all_mudra_predictions = []
-            annotated_frame = frame.copy()
-
-            finger_joints = {
-                "Thumb": [1, 2, 3, 4],
-                "Index": [5, 6, 7, 8],
-                "Middle": [9, 10, 11, 12],
-                "Ring": [13, 14, 15, 16],
-                "Little": [17, 18, 19, 20],
-            }
-            if results.multi_hand_landmarks:
-                for hand_no, hand_landmarks in enumerate(results.multi_hand_landmarks):
-                    # Draw landmarks on annotated image
-                    mp_drawing.draw_landmarks(
-                        annotated_frame, 
-                        hand_landmarks, 
-                        mp_hands.HAND_CONNECTIONS
-                    )
-
-                    # Convert landmarks to pixel coordinates
-                    landmarks = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks.landmark]
-
-                    # Calculate finger confidence
-                    finger_scores = {}
-                    for name, idx in finger_joints.items():
-                        try:
-                            ang = finger_angle(landmarks[idx[0]], landmarks[idx[1]], landmarks[idx[2]])
-                            finger_scores[name] = round(angle_to_conf(ang, name), 2)
-                        except Exception:
-                            finger_scores[name] = 0.0
-
-                    all_finger_confidence[f"hand_{hand_no + 1}"] = finger_scores
-
-                    # Mudra prediction for this hand
-                    x_coords = [p[0] for p in landmarks]
-                    y_coords = [p[1] for p in landmarks]
-                    x1, y1, x2, y2 = min(x_coords), min(y_coords), max(x_coords), max(y_coords)
-                    
-                    # Add padding
-                    padding = 20
-                    x1 = max(0, x1 - padding)
-                    y1 = max(0, y1 - padding)
-                    x2 = min(w, x2 + padding)
-                    y2 = min(h, y2 + padding)
-                    
-                    hand_crop = frame[y1:y2, x1:x2]
-                    if hand_crop.size > 0:
-                        hand_resized = cv2.resize(hand_crop, IMG_SIZE)
-                        hand_array = np.expand_dims(hand_resized, axis=0).astype(np.float32) / 255.0
-                        pred = model.predict(hand_array, verbose=0)
-                        top_indices = np.argsort(pred[0])[-3:][::-1]
-                        
-                        hand_predictions = []
-                        for idx in top_indices:
-                            hand_predictions.append({
-                                "class": class_names[idx],
-                                "probability": float(pred[0][idx]),
-                                "confidence": float(pred[0][idx]) * 100
-                            })
-                        
-                        all_mudra_predictions.append({"hand_number": hand_no + 1,"predictions": hand_predictions})
-
-                        # Add label to annotated image
-                        if hand_predictions:
-                            top_pred = hand_predictions[0]
-                            label = f"Hand {hand_no+1}: {top_pred['class']} ({top_pred['confidence']:.1f}%)"
-                            cv2.putText(annotated_frame, label, (x1, y1-10),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-            # Prepare response
-            response_data = {
-                "num_hands": num_hands,
-                "finger_confidence": all_finger_confidence,
-                "mudra_predictions": all_mudra_predictions
-            }
-            # Include annotated image if requested
-            if include_annotated_image:
-                response_data["annotated_image"] = image_to_base64(annotated_frame)
-
-            return response_data
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                contents = decode_message(message)
+                if contents:
+                    session.offer(contents)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            session.end_stream()
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error in hand analysis: {str(e)}")
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        while True:
+            item = await session.next_frame()
+            if item is None:
+                break
+            frame_id, contents = item
+            try:
+                response_data = await worker_pool.run(analyze_live_frame, session, contents, classifier)
+            except QueueFullError:
+                response_data = {"error": "Server is busy, frame skipped"}
+            except Exception as e:
+                print(f"Error in live frame analysis: {e}", file=sys.stderr)
+                response_data = {"error": f"Error in live frame analysis: {str(e)}"}
+            else:
+                session.processed += 1
+            response_data["frame_id"] = frame_id
+            response_data["dropped_frames"] = session.dropped
+            await websocket.send_json(response_data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        live_sessions.discard(session)
+        session.close()
+        live_slots.release()
+
+# Video clips are spooled to disk and decoded frame by frame; VIDEO_MAX_SIDE
+# keeps sampled frames small since MediaPipe works at low resolution anyway
+MAX_VIDEO_MB = float(os.getenv("MAX_VIDEO_MB", "200"))
+VIDEO_SAMPLE_FPS = float(os.getenv("VIDEO_SAMPLE_FPS", "5"))
+VIDEO_MAX_SIDE = int(os.getenv("VIDEO_MAX_SIDE", "640"))
+# Frames whose crops may be queued on the batcher before the oldest is resolved
+VIDEO_LOOKAHEAD_FRAMES = 4
+
+def video_hand_predictions(frame, results, classifier):
+    """Queue every detected hand of a video frame; returns [(hand, future, landmark_probs)]"""
+    if not results.multi_hand_landmarks:
+        return []
+    h, w, _ = frame.shape
+    points = hands_array(results.multi_hand_landmarks, w, h)
+    if results.multi_handedness:
+        labels = [hand.classification[0].label for hand in results.multi_handedness]
+    else:
+        labels = [f"hand_{hand_no + 1}" for hand_no in range(len(points))]
+    # Two hands can be reported with the same handedness; keep their tracks apart
+    labels = [label if labels.index(label) == i else f"{label}_{i + 1}" for i, label in enumerate(labels)]
+
+    with stage("landmarks"):
+        landmark_probs = [None] * len(points)
+        if classifier != "cnn":
+            landmark_probs = landmark_classifier.predict(landmark_features(points, [l == "Left" for l in labels]))
+
+    predictions = []
+    for hand_no, label in enumerate(labels):
+        future = None
+        run_cnn, hand_landmark_probs, _ = prediction_plan(classifier, landmark_probs[hand_no])
+        if run_cnn:
+            with stage("crop"):
+                hand_array = model_input(frame, hand_box(points[hand_no], w, h))
+            if hand_array is not None:
+                future = batcher.submit(hand_array)
+        if future is not None or hand_landmark_probs is not None:
+            predictions.append((label, future, hand_landmark_probs))
+    return predictions
+
+def analyze_video(path, sample_fps, classifier="cnn"):
+    """
+    Sample a video file, track hands across frames and build the mudra
+    timeline (runs on a worker thread). Crops of the next few frames are
+    queued before older ones are resolved, so they share batches.
+    """
+    started = time.perf_counter()
+    fps, _, duration = video_info(path)
+    frame_interval = sampled_frame_interval(fps, sample_fps)
+    timeline = MudraTimeline(class_names, frame_interval)
+    pending = deque()
+    frames = 0
+    last_t = 0.0
+
+    def resolve_oldest():
+        t, predictions = pending.popleft()
+        timeline.expire(t)
+        for hand, future, landmark_probs in predictions:
+            timeline.add(t, hand, resolve_prediction(future, landmark_probs))
+
+    hands = create_tracking_hands()
+    try:
+        for t, frame in iter_sampled_frames(path, sample_fps, VIDEO_MAX_SIDE):
+            with stage("track"):
+                results = hands.process(frame)
+            pending.append((t, video_hand_predictions(frame, results, classifier)))
+            charge(VIDEO_FRAME_COST)
+            frames += 1
+            last_t = t
+            while len(pending) > VIDEO_LOOKAHEAD_FRAMES:
+                resolve_oldest()
+        while pending:
+            resolve_oldest()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        hands.close()
+
+    processing_s = time.perf_counter() - started
+    duration = duration or last_t + frame_interval
+    return {
+        "duration_s": round(duration, 3),
+        "source_fps": round(fps, 3),
+        "sample_fps": sample_fps,
+        "frames_analyzed": frames,
+        "processing_s": round(processing_s, 3),
+        "realtime_factor": round(duration / processing_s, 2) if processing_s else None,
+        "segments": timeline.finish(),
+    }
+
+async def spool_upload(file, max_bytes):
+    """Copy an upload into a temporary file in chunks, failing with 413 past max_bytes; returns its path"""
+    suffix = os.path.splitext(file.filename or "")[1]
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as out:
+        try:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes / (1024 * 1024):g} MB limit.")
+                out.write(chunk)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    return out.name
+
+@app.post("/video_analysis")
+async def video_analysis(
+    file: UploadFile = File(...),
+    sample_fps: float = Query(VIDEO_SAMPLE_FPS, gt=0, le=30),
+    classifier: Literal["cnn", "landmark", "combined", "cascade"] = "cnn",
+):
+    """
+    Timeline of the mudras in a recorded clip: a list of
+    {start, end, hand, mudra, confidence} segments in seconds.
+    """
+    check_classifier(classifier)
+    path = await spool_upload(file, int(MAX_VIDEO_MB * 1024 * 1024))
+    try:
+        return await run_in_worker(analyze_video, path, sample_fps, classifier)
+    finally:
+        os.remove(path)
 
 @app.get("/")
 async def root():
@@ -281,7 +1067,105 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model_loaded": True}
+    return {
+        "status": "healthy" if lifecycle.ready else "starting",
+        "model_loaded": lifecycle.component_ready("model"),
+    }
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving HTTP (components may still be loading)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """200 once every required component is loaded and warmed up, 503 before that"""
+    status = lifecycle.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, model and Gemini metrics"""
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def cascade_stats():
+    answered = {stage_name: CASCADE_STAGES.value(stage=stage_name) for stage_name in ("landmark", "cnn")}
+    hands = sum(answered.values())
+    return {
+        "margin": CASCADE_MARGIN,
+        "hands": hands,
+        "answered_by_landmark": answered["landmark"],
+        "escalated_to_cnn": answered["cnn"],
+        "escalation_rate": round(answered["cnn"] / hands, 4) if hands else 0.0,
+    }
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for the inference pipeline"""
+    return {
+        "backend": inference_backend.name if inference_backend else None,
+        "startup": lifecycle.status(),
+        "workers": worker_pool.stats(),
+        "batching": batcher.stats() if batcher else None,
+        "hands_pool": hands_pool.stats() if hands_pool else None,
+        "result_cache": result_cache.stats(),
+        "annotated_images": annotated_images.stats(),
+        "roi_sessions": roi_sessions.stats(),
+        "cascade": cascade_stats(),
+        "mudra_info_cache": info_cache.stats(),
+        "gemini": gemini_fetcher.stats(),
+        "admission": admission.stats(),
+        "live": {
+            "sessions": len(live_sessions),
+            "max_sessions": LIVE_SESSIONS_MAX,
+            "frames_received": sum(sess.received for sess in live_sessions),
+            "frames_dropped": sum(sess.dropped for sess in live_sessions),
+        },
+    }
+
+# Optional real hand photo for the end-to-end warm-up; without it a blank
+# frame still exercises decoding, detection and the batcher
+WARMUP_IMAGE = os.getenv("WARMUP_IMAGE")
+
+def load_warmup_image():
+    if WARMUP_IMAGE:
+        with open(WARMUP_IMAGE, "rb") as f:
+            return f.read()
+    success, encoded = cv2.imencode(".jpg", np.zeros((480, 640, 3), dtype=np.uint8))
+    return encoded.tobytes()
+
+def warm_pipeline(contents):
+    """Run one request through each path so first real requests skip lazy initialization"""
+    predict_from_bytes(contents)
+    analyze_hand_image(contents, "none", "cnn")
+
+def register_components():
+    lifecycle.register("model", load_model, warm_model)
+    lifecycle.register("hands", load_hands, lambda pool: pool.warm_up())
+    lifecycle.register("landmark_classifier", load_landmark_classifier, required=False)
+    lifecycle.register("pose_index", load_pose_index, required=False)
+    lifecycle.register("gemini", init_client, required=False)
+    lifecycle.register("pipeline", load_warmup_image, warm_pipeline, depends_on=("model", "hands"))
+
+@app.on_event("startup")
+async def startup():
+    register_components()
+    lifecycle.start()
+    if MUDRA_INFO_WARMUP:
+        # Pre-fill the Gemini cache for all classes without delaying startup
+        asyncio.get_running_loop().run_in_executor(None, warm_cache, info_cache)
+
+@app.on_event("shutdown")
+def shutdown():
+    worker_pool.shutdown(wait=False)
+    if batcher is not None:
+        batcher.close()
+    if hasattr(inference_backend, "close"):
+        inference_backend.close()
+    if hands_pool is not None:
+        hands_pool.close()
+    roi_sessions.close()
+    info_cache.close()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,155 @@
+import numpy as np
+
+from labels import IMG_SIZE
+
+# TensorFlow is imported by the backend constructors, so importing this module
+# (and the app) stays cheap and the import cost lands in the loading thread
+
+
+def configure_tf_threads(intra_op_threads=None, inter_op_threads=None):
+    """
+    Cap TensorFlow's thread pools. Must run before the first op executes, so
+    several processes sharing a machine do not each spawn one thread per core.
+    """
+    import tensorflow as tf
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(int(intra_op_threads))
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(int(inter_op_threads))
+
+
+def warm_batch_sizes(max_batch_size):
+    """Batch sizes to run once before serving: 1, the padded XLA shapes and the maximum"""
+    sizes = {1, max_batch_size}
+    size = 1
+    while size < max_batch_size:
+        sizes.add(size)
+        size *= 2
+    return sorted(sizes)
+
+
+class KerasBackend:
+    """
+    Full TensorFlow/Keras model at float32.
+
+    With compiled=True (default) the forward pass is a tf.function with a fixed
+    (None, 128, 128, 3) float32 signature, traced once here and called
+    directly, instead of model.predict(), which builds a data adapter and runs
+    callbacks on every call. jit_compile=True also compiles it with XLA; XLA
+    specializes on the batch size, so batches are zero-padded to the next power
+    of two and only a handful of shapes is ever compiled.
+    """
+
+    name = "keras"
+
+    def __init__(self, model_path, intra_op_threads=None, inter_op_threads=None, compiled=True, jit_compile=False):
+        import tensorflow as tf
+
+        configure_tf_threads(intra_op_threads, inter_op_threads)
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path)
+        self.jit_compile = bool(compiled and jit_compile)
+        self._forward = None
+        self._to_tensor = tf.convert_to_tensor
+        if compiled:
+            forward = tf.function(
+                lambda images: self.model(images, training=False),
+                input_signature=[tf.TensorSpec((None, *IMG_SIZE, 3), tf.float32)],
+                jit_compile=self.jit_compile,
+            )
+            self._forward = forward.get_concrete_function()
+
+    def predict(self, batch):
+        if self._forward is None:
+            return self.model.predict(batch, batch_size=len(batch), verbose=0)
+        n = len(batch)
+        if self.jit_compile and n & (n - 1):
+            padded = np.zeros((1 << n.bit_length(), *batch.shape[1:]), dtype=np.float32)
+            padded[:n] = batch
+            batch = padded
+        return self._forward(self._to_tensor(np.asarray(batch, dtype=np.float32))).numpy()[:n]
+
+
+class TFLiteBackend:
+    """
+    TFLite interpreter for a model produced by export_tflite.py.
+
+    Works for float32, float16 and int8 exports: quantized input/output tensors
+    are (de)quantized here, so callers always pass float32 batches in the same
+    0-255 RGB range as the Keras model. Interpreters are not thread-safe and
+    must only be driven from one thread (the inference batcher).
+
+    Resizing an interpreter's input reallocates all its tensors, so instead
+    there is one interpreter per size in warm_batch_sizes(max_batch_size),
+    each allocated once on first use. A batch is zero-padded to the
+    smallest of those sizes that fits it.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None, max_batch_size=1):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.batch_sizes = warm_batch_sizes(max_batch_size)
+        self._interpreter_class = tf.lite.Interpreter
+        self._interpreters = {}
+        # Load the model now so a bad path fails at startup
+        self._interpreter(self.batch_sizes[0])
+
+    def _interpreter(self, size):
+        """(interpreter, input details, output details) with a fixed batch size"""
+        entry = self._interpreters.get(size)
+        if entry is None:
+            interpreter = self._interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+            details = interpreter.get_input_details()[0]
+            if int(details["shape"][0]) != size:
+                interpreter.resize_tensor_input(details["index"], [size, *details["shape"][1:]])
+            interpreter.allocate_tensors()
+            entry = self._interpreters[size] = (
+                interpreter, interpreter.get_input_details()[0], interpreter.get_output_details()[0])
+        return entry
+
+    def predict(self, batch):
+        n = len(batch)
+        size = next((size for size in self.batch_sizes if size >= n), n)
+        interpreter, input_details, output_details = self._interpreter(size)
+        if size != n:
+            padded = np.zeros((size, *batch.shape[1:]), dtype=np.float32)
+            padded[:n] = batch
+            batch = padded
+
+        inputs = batch
+        if input_details["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = input_details["quantization"]
+            info = np.iinfo(input_details["dtype"])
+            inputs = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+        interpreter.set_tensor(input_details["index"], inputs.astype(input_details["dtype"]))
+        interpreter.invoke()
+
+        outputs = interpreter.get_tensor(output_details["index"])[:n]
+        if output_details["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = output_details["quantization"]
+            outputs = (outputs.astype(np.float32) - zero_point) * scale
+        return outputs
+
+
+def load_backend(kind, keras_path="best_mudra_model.keras", tflite_path="best_mudra_model.tflite", num_threads=None,
+                 inter_op_threads=None, server_address=None, max_batch_size=16, compiled=True, jit_compile=False):
+    """
+    Create the inference backend selected by INFERENCE_BACKEND. num_threads is
+    the TFLite interpreter / TF intra-op thread count; "remote" forwards batches
+    to a model_server.py process at server_address. compiled/jit_compile
+    select the Keras forward pass (see KerasBackend).
+    """
+    if kind == "keras":
+        return KerasBackend(keras_path, intra_op_threads=num_threads, inter_op_threads=inter_op_threads,
+                            compiled=compiled, jit_compile=jit_compile)
+    if kind == "tflite":
+        return TFLiteBackend(tflite_path, num_threads=num_threads, max_batch_size=max_batch_size)
+    if kind == "remote":
+        from model_server import RemoteBackend
+        return RemoteBackend(server_address, max_batch_size=max_batch_size)
+    raise ValueError(f"Unknown inference backend '{kind}', expected 'keras', 'tflite' or 'remote'")
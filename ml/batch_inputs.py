@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed", "application/x-zip")
+
+
+class InputTooLargeError(ValueError):
+    """Raised by a loader when an image exceeds the per-image size limit"""
+
+
+@dataclass
+class BatchUpload:
+    filename: str
+    content_type: str
+    file: object
+
+    @property
+    def is_zip(self):
+        return (self.filename or "").lower().endswith(".zip") or self.content_type in ZIP_CONTENT_TYPES
+
+
+def detach_uploads(uploads):
+    """
+    Copy request uploads into temporary files owned by the caller. FastAPI
+    closes UploadFile objects once the endpoint returns, before a streaming
+    response has been produced. Large files spill to disk, not memory. Blocking.
+    """
+    detached = []
+    for upload in uploads:
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        upload.file.seek(0)
+        shutil.copyfileobj(upload.file, spooled)
+        spooled.seek(0)
+        detached.append(BatchUpload(upload.filename, upload.content_type, spooled))
+    return detached
+
+
+def iter_upload_images(uploads, max_image_bytes):
+    """
+    Yield (name, loader) for every image in a /predict_batch request.
+
+    Plain uploads yield themselves; zip uploads yield one entry per image
+    member. loader() reads the bytes on demand (call it from a worker thread),
+    so only the images currently being decoded are held in memory no matter
+    how large the archive is.
+    """
+    for upload in uploads:
+        if upload.is_zip:
+            archive = zipfile.ZipFile(upload.file)
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                if os.path.basename(info.filename).startswith("."):
+                    continue
+                yield info.filename, _zip_loader(archive, info, max_image_bytes)
+        else:
+            yield upload.filename, _file_loader(upload.file, max_image_bytes)
+
+
+def _read_limited(fileobj, max_image_bytes):
+    data = fileobj.read(max_image_bytes + 1)
+    if len(data) > max_image_bytes:
+        raise InputTooLargeError(f"Image is larger than {max_image_bytes} bytes")
+    return data
+
+
+def _zip_loader(archive, info, max_image_bytes):
+    def load():
+        # Read at most the limit even if the archive lies about file sizes
+        with archive.open(info) as member:
+            return _read_limited(member, max_image_bytes)
+    return load
+
+
+def _file_loader(fileobj, max_image_bytes):
+    def load():
+        fileobj.seek(0)
+        return _read_limited(fileobj, max_image_bytes)
+    return load
@@ -0,0 +1,133 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """
+    Shared scheduler that groups single-image inference requests into batches.
+
+    Callers submit one preprocessed (H, W, 3) array (uint8 or float) and get
+    back a Future that resolves to that image's probability row. A background
+    thread waits for up to `max_wait_ms` after the oldest pending request (or
+    until `max_batch_size` requests are queued), copies the inputs into a
+    preallocated float32 batch buffer and runs a single forward pass.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._buffer = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queue a single image and return a Future for its probability row"""
+        future = Future()
+        self._queue.put((image, future, time.perf_counter()))
+        return future
+
+    def predict(self, image):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(image).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "pending": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": self._wait_total / self._items * 1000.0 if self._items else 0.0,
+                "max_queue_wait_ms": self._wait_max * 1000.0,
+            }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        stop = False
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            # Claim every future; ones already cancelled by their caller are dropped
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            try:
+                if batch:
+                    self._process(batch)
+            except Exception as e:
+                # Never let one bad batch stop inference for the whole process
+                print(f"Inference batcher error: {e}", file=sys.stderr)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _batch_buffer(self, shape):
+        """Reuse one float32 buffer for every batch (only touched by the batcher thread)"""
+        if self._buffer is None or self._buffer.shape[1:] != tuple(shape):
+            self._buffer = np.empty((self.max_batch_size, *shape), dtype=np.float32)
+        return self._buffer
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued in batch]
+        try:
+            inputs = self._batch_buffer(batch[0][0].shape)[:len(batch)]
+            for i, (image, _, _) in enumerate(batch):
+                np.copyto(inputs[i], image)
+            probs = np.asarray(self.predict_fn(inputs))
+        except Exception as e:
+            with self._lock:
+                self._errors += len(batch)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for row, (_, future, _) in zip(probs, batch):
+            future.set_result(row)
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
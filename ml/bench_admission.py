@@ -0,0 +1,187 @@
+"""
+Load test for admission control: latency of well-behaved clients while one
+client floods /hand_analysis with annotated requests.
+
+Runs app.py in-process like bench_api.py, with one ASGI transport per client
+address, in three phases of --duration seconds each:
+
+    polite_only         the polite clients alone (baseline)
+    abuse_unprotected   polite clients + abuser, admission control disabled
+    abuse_protected     polite clients + abuser, admission control enabled
+
+Polite clients send /hand_analysis at a fixed --polite-rate each (open loop,
+so slow responses do not slow the senders down). The abuser keeps
+--abuse-concurrency annotated requests in flight and retries immediately,
+ignoring Retry-After. The report has polite p50/p95/p99 latency and error
+rate per phase plus the abuser's status codes. With admission on, the
+abuser is held to ADMISSION_HEAVY_SLOTS requests in flight, so polite p99
+should stay near the baseline.
+
+    python bench_admission.py --duration 20 --output admission.json
+    python bench_admission.py --images samples/ --polite-clients 8 --abuse-concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from bench_api import build_corpus, environment, summarize
+
+PHASES = {
+    "polite_only": {"abuse": False, "admission": False},
+    "abuse_unprotected": {"abuse": True, "admission": False},
+    "abuse_protected": {"abuse": True, "admission": True},
+}
+
+
+def client_for(app, address):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, client=(address, 50000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+
+
+async def polite_client(client, images, rate, deadline, latencies, statuses):
+    """Send one plain /hand_analysis every 1/rate seconds until deadline"""
+    async def one(index):
+        files = {"file": ("hand.jpg", images[index % len(images)], "image/jpeg")}
+        started = time.perf_counter()
+        try:
+            response = await client.post("/hand_analysis", files=files)
+            status = response.status_code
+        except Exception:
+            status = "error"
+        statuses[status] += 1
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    index = 0
+    next_send = time.perf_counter()
+    while next_send < deadline:
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(one(index)))
+        index += 1
+        next_send += 1.0 / rate
+    await asyncio.gather(*tasks)
+
+
+async def abusive_client(client, images, concurrency, deadline, statuses):
+    """Keep `concurrency` annotated /hand_analysis requests in flight until deadline"""
+    async def loop(offset):
+        index = offset
+        while time.perf_counter() < deadline:
+            files = {"file": ("hand.jpg", images[index % len(images)], "image/jpeg")}
+            try:
+                response = await client.post("/hand_analysis", params={"annotation": "inline"}, files=files)
+                statuses[response.status_code] += 1
+            except Exception:
+                statuses["error"] += 1
+            index += concurrency
+
+    await asyncio.gather(*(loop(offset) for offset in range(concurrency)))
+
+
+async def run_phase(app_module, phase, images, args):
+    settings = PHASES[phase]
+    app_module.admission.enabled = settings["admission"]
+    # Start every phase with fresh buckets
+    app_module.admission._buckets.clear()
+
+    polite_clients = [client_for(app_module.app, f"10.0.0.{i + 1}") for i in range(args.polite_clients)]
+    abuser = client_for(app_module.app, "10.0.1.1")
+    latencies = []
+    polite_statuses = Counter()
+    abuse_statuses = Counter()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    try:
+        jobs = [polite_client(client, images, args.polite_rate, deadline, latencies, polite_statuses)
+                for client in polite_clients]
+        if settings["abuse"]:
+            jobs.append(abusive_client(abuser, images, args.abuse_concurrency, deadline, abuse_statuses))
+        await asyncio.gather(*jobs)
+    finally:
+        for client in polite_clients + [abuser]:
+            await client.aclose()
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in polite_statuses.items() if status != 200)
+    result = {"phase": phase, **settings, "polite": summarize(latencies, errors, elapsed)}
+    result["polite"]["statuses"] = {str(status): count for status, count in sorted(polite_statuses.items(), key=str)}
+    if settings["abuse"]:
+        result["abuser"] = {
+            "requests": sum(abuse_statuses.values()),
+            "statuses": {str(status): count for status, count in sorted(abuse_statuses.items(), key=str)},
+        }
+    result["admission"] = app_module.admission.stats()
+    p99 = result["polite"].get("latency_ms", {}).get("p99", float("nan"))
+    print(f"{phase:20} polite p99 {p99:8.1f} ms  polite errors {errors:<5} "
+          f"abuser {dict(abuse_statuses) if settings['abuse'] else '-'}", file=sys.stderr)
+    return result
+
+
+async def run(args):
+    import app as app_module
+
+    await app_module.app.router.startup()
+    if not await asyncio.to_thread(app_module.lifecycle.wait, args.startup_timeout):
+        raise SystemExit(f"App did not become ready: {json.dumps(app_module.lifecycle.status())}")
+    images = build_corpus([args.resolution], args.images)[args.resolution]
+    try:
+        results = [await run_phase(app_module, phase, images, args) for phase in args.phases]
+    finally:
+        await app_module.app.router.shutdown()
+
+    return {
+        "environment": environment(),
+        "config": {
+            "duration_s": args.duration,
+            "polite_clients": args.polite_clients,
+            "polite_rate": args.polite_rate,
+            "abuse_concurrency": args.abuse_concurrency,
+            "resolution": args.resolution,
+            "images": args.images or "synthetic",
+            "worker_threads": app_module.WORKER_THREADS,
+            "worker_queue_limit": app_module.WORKER_QUEUE_LIMIT,
+            "admission_rate": app_module.ADMISSION_RATE,
+            "admission_burst": app_module.ADMISSION_BURST,
+            "admission_shed_start": app_module.ADMISSION_SHED_START,
+            "admission_heavy_slots": app_module.ADMISSION_HEAVY_SLOTS,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phases", nargs="+", choices=list(PHASES), default=list(PHASES))
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    parser.add_argument("--polite-clients", type=int, default=4)
+    parser.add_argument("--polite-rate", type=float, default=2.0, help="requests per second per polite client")
+    parser.add_argument("--abuse-concurrency", type=int, default=32)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--images", help="directory of hand photos to resize (default: synthetic corpus)")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    # Every request must do real work, and nothing should call out to Gemini
+    os.environ["RESULT_CACHE_ENTRIES"] = "0"
+    os.environ["MUDRA_INFO_WARMUP"] = "false"
+    os.environ["GEMINI_STUB"] = "true"
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
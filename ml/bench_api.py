@@ -0,0 +1,267 @@
+"""
+Offline load and latency benchmark for the ML endpoints.
+
+Starts app.py in-process (no network, no uvicorn) with a local stub in place
+of the Gemini client, then drives /predict, /hand_analysis with and without
+annotation and /mudra_info at each concurrency level. Writes one JSON report
+with throughput, p50/p95/p99 latency and peak RSS per scenario, so runs from
+different commits can be diffed.
+
+Examples:
+    python bench_api.py --output bench.json
+    python bench_api.py --images samples/ --resolutions 640x480 1920x1080 --concurrency 1 8 32
+    python bench_api.py --scenarios predict mudra_info --requests 500
+
+Without --images the corpus is synthetic. MediaPipe usually finds no hands in it,
+so /hand_analysis then measures decode and detection only. Point --images
+at a few real hand photos to exercise the full crop/classify/draw path.
+Result caching is disabled unless --result-cache is given, so repeated
+images are computed every time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from bench_ingest import peak_rss_kb
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+SCENARIOS = {
+    "predict": ("/predict", {}),
+    "hand_analysis": ("/hand_analysis", {}),
+    "hand_analysis_annotated": ("/hand_analysis", {"annotation": "inline"}),
+    "hand_analysis_landmarks": ("/hand_analysis", {"annotation": "landmarks"}),
+    "mudra_info": ("/mudra_info", None),
+}
+
+
+def reset_peak_rss():
+    """Reset VmHWM so each scenario reports its own peak (Linux only; best effort)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def synthetic_image(width, height, seed):
+    """Deterministic skin-toned blob on a textured background"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.stack([(x * 180 // width) + 40, (y * 160 // height) + 50, np.full_like(x, 90)], axis=-1)
+    image = (image + rng.normal(0, 12, image.shape)).clip(0, 255).astype(np.uint8)
+    center = (width // 2, height // 2)
+    axes = (width // 6, height // 4)
+    cv2.ellipse(image, center, axes, 0, 0, 360, (140, 170, 220), -1)
+    for finger in range(5):
+        tip = (center[0] - axes[0] + finger * axes[0] // 2, center[1] - axes[1] * 2)
+        cv2.line(image, (tip[0], center[1]), tip, (140, 170, 220), max(4, width // 40))
+    return image
+
+
+def build_corpus(resolutions, images_dir=None, per_resolution=4, quality=90):
+    """{resolution: [jpeg bytes, ...]}; the same inputs every run"""
+    sources = []
+    if images_dir:
+        for root, _, files in os.walk(images_dir):
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    image = cv2.imread(os.path.join(root, name))
+                    if image is not None:
+                        sources.append(image)
+        sources = sources[:per_resolution]
+        if not sources:
+            raise SystemExit(f"No images found in {images_dir}")
+
+    corpus = {}
+    for resolution in resolutions:
+        width, height = (int(v) for v in resolution.split("x"))
+        if sources:
+            images = [cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA) for image in sources]
+        else:
+            images = [synthetic_image(width, height, seed) for seed in range(per_resolution)]
+        corpus[resolution] = [cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+                              for image in images]
+    return corpus
+
+
+def summarize(latencies, errors, elapsed):
+    latencies_ms = np.asarray(latencies) * 1000
+    completed = len(latencies)
+    summary = {
+        "requests": completed + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+    }
+    if completed:
+        summary["latency_ms"] = {
+            "mean": round(float(latencies_ms.mean()), 2),
+            "p50": round(float(np.percentile(latencies_ms, 50)), 2),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 2),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 2),
+            "max": round(float(latencies_ms.max()), 2),
+        }
+    return summary
+
+
+async def drive(client, make_request, total, concurrency):
+    """Send `total` requests from `concurrency` concurrent callers; returns (latencies, errors, elapsed)"""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def caller():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, index)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def request_factory(scenario, images):
+    path, params = SCENARIOS[scenario]
+    if params is None:
+        from labels import class_names
+
+        async def mudra_info(client, index):
+            return await client.get(path, params={"mudra_name": class_names[index % len(class_names)]})
+        return mudra_info
+
+    async def upload(client, index):
+        files = {"file": ("hand.jpg", images[index % len(images)], "image/jpeg")}
+        return await client.post(path, params=params, files=files)
+    return upload
+
+
+async def run(args):
+    import httpx
+    import app as app_module
+
+    started = time.perf_counter()
+    await app_module.app.router.startup()
+    if not await asyncio.to_thread(app_module.lifecycle.wait, args.startup_timeout):
+        raise SystemExit(f"App did not become ready: {json.dumps(app_module.lifecycle.status())}")
+    startup_s = time.perf_counter() - started
+
+    corpus = build_corpus(args.resolutions, args.images)
+    transport = httpx.ASGITransport(app=app_module.app)
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in args.scenarios:
+                resolutions = [None] if SCENARIOS[scenario][1] is None else args.resolutions
+                for resolution in resolutions:
+                    make_request = request_factory(scenario, corpus.get(resolution))
+                    for concurrency in args.concurrency:
+                        await drive(client, make_request, args.warmup, concurrency)
+                        peak_resettable = reset_peak_rss()
+                        baseline_kb = peak_rss_kb()
+                        latencies, errors, elapsed = await drive(client, make_request, args.requests, concurrency)
+                        result = {"scenario": scenario, "resolution": resolution, "concurrency": concurrency}
+                        result.update(summarize(latencies, errors, elapsed))
+                        result["peak_rss_mb"] = round(peak_rss_kb() / 1024, 1)
+                        if peak_resettable:
+                            result["peak_rss_increase_mb"] = round((peak_rss_kb() - baseline_kb) / 1024, 1)
+                        results.append(result)
+                        print(f"{scenario:24} {resolution or '-':>10} c={concurrency:<3} "
+                              f"{result['throughput_rps']:8.1f} req/s  "
+                              f"p50 {result.get('latency_ms', {}).get('p50', float('nan')):8.1f} ms  "
+                              f"p99 {result.get('latency_ms', {}).get('p99', float('nan')):8.1f} ms  "
+                              f"errors {errors}", file=sys.stderr)
+    finally:
+        await app_module.app.router.shutdown()
+
+    return {
+        "environment": environment(),
+        "config": {
+            "resolutions": args.resolutions,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "images": args.images or "synthetic",
+            "result_cache": args.result_cache,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "backend": app_module.INFERENCE_BACKEND,
+            "worker_threads": app_module.WORKER_THREADS,
+            "batch_max_size": app_module.BATCH_MAX_SIZE,
+        },
+        "startup_s": round(startup_s, 2),
+        "startup": app_module.lifecycle.status(),
+        "results": results,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS),
+                        default=["predict", "hand_analysis", "hand_analysis_annotated", "mudra_info"])
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080", "4032x3024"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each scenario")
+    parser.add_argument("--images", help="directory of hand photos to resize (default: synthetic corpus)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0, help="latency of the Gemini stub")
+    parser.add_argument("--result-cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported: no result cache or admission control, fresh /mudra_info cache
+    if not args.result_cache:
+        os.environ["RESULT_CACHE_ENTRIES"] = "0"
+    # Every simulated request comes from one address; measure the API, not the rate limiter
+    os.environ["ADMISSION_ENABLED"] = "false"
+    cache_dir = tempfile.mkdtemp(prefix="bench-api-")
+    os.environ["MUDRA_INFO_CACHE_PATH"] = os.path.join(cache_dir, "mudra_info_cache.db")
+    os.environ["MUDRA_INFO_WARMUP"] = "false"
+    # Offline: mudra_info creates its stub client instead of the real one
+    os.environ["GEMINI_STUB"] = "true"
+    os.environ["GEMINI_STUB_LATENCY_MS"] = str(args.gemini_latency_ms)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Per-call cost of the Keras forward pass: model.predict() vs the compiled
+tf.function KerasBackend uses by default, with and without XLA.
+
+Each mode loads the model once, runs every batch size a few times untimed,
+then times --calls calls per batch size. predict_overhead_ms is how much
+longer model.predict() takes than the compiled call for the same batch.
+That difference is pure per-call overhead (data adapter, callbacks, tracing
+checks), because both run the same graph.
+
+    python bench_forward.py --output forward.json
+    python bench_forward.py --model best_mudra_model.keras --batch-sizes 1 2 4 16 --calls 500
+    python bench_forward.py --synthetic          # small stand-in CNN, no model file needed
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backends import KerasBackend
+from bench_api import environment
+from labels import IMG_SIZE, class_names
+
+MODES = {
+    "predict": {"compiled": False},
+    "tf_function": {"compiled": True},
+    "tf_function_xla": {"compiled": True, "jit_compile": True},
+}
+
+
+def synthetic_model(path):
+    """Save a small CNN with the service's input and output shapes to path"""
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.Input((*IMG_SIZE, 3)),
+        tf.keras.layers.Rescaling(1 / 255.0),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation="relu"),
+        tf.keras.layers.Conv2D(32, 3, strides=2, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(len(class_names), activation="softmax"),
+    ])
+    model.save(path)
+    return path
+
+
+def time_calls(backend, batch, calls):
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        backend.predict(batch)
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "p50": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95": round(float(np.percentile(latencies_ms, 95)), 3),
+        "mean": round(float(latencies_ms.mean()), 3),
+    }
+
+
+def run(model_path, modes, batch_sizes, calls, warmup):
+    rng = np.random.default_rng(0)
+    batches = {size: rng.uniform(0, 255, (size, *IMG_SIZE, 3)).astype(np.float32) for size in batch_sizes}
+    results = {}
+    for mode in modes:
+        started = time.perf_counter()
+        backend = KerasBackend(model_path, **MODES[mode])
+        for batch in batches.values():
+            for _ in range(warmup):
+                backend.predict(batch)
+        results[mode] = {"load_and_warmup_s": round(time.perf_counter() - started, 2), "latency_ms": {}}
+        for size, batch in batches.items():
+            results[mode]["latency_ms"][size] = time_calls(backend, batch, calls)
+            print(f"{mode:16} batch {size:<3} p50 {results[mode]['latency_ms'][size]['p50']:8.3f} ms", file=sys.stderr)
+
+    if "predict" in results and "tf_function" in results:
+        results["predict_overhead_ms"] = {
+            size: round(results["predict"]["latency_ms"][size]["p50"]
+                        - results["tf_function"]["latency_ms"][size]["p50"], 3)
+            for size in batch_sizes
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "best_mudra_model.keras"))
+    parser.add_argument("--synthetic", action="store_true", help="benchmark a small stand-in CNN instead of --model")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per mode and batch size")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls per mode and batch size")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    model_path = args.model
+    if args.synthetic:
+        model_path = synthetic_model(os.path.join(tempfile.mkdtemp(prefix="bench-forward-"), "synthetic.keras"))
+
+    report = {
+        "environment": environment(),
+        "config": {"model": "synthetic" if args.synthetic else model_path, "batch_sizes": args.batch_sizes,
+                   "calls": args.calls, "warmup": args.warmup},
+        "results": run(model_path, args.modes, args.batch_sizes, args.calls, args.warmup),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Peak memory of one /hand_analysis-style image ingestion, old path vs bounded path.
+
+    python bench_ingest.py                      # synthetic 12 MP JPEG
+    python bench_ingest.py --image photo.jpg --max-side 1280
+
+Each mode runs in a fresh subprocess, so the numbers are not polluted by
+earlier runs. It reports the increase in peak RSS (VmHWM) over the process
+baseline, the NumPy/OpenCV allocation peak from tracemalloc and the size of
+the frame buffers the mode holds.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from preprocessing import decode_rgb, to_bgr
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process (VmHWM resets on exec, unlike ru_maxrss)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_mode(mode, path, max_side):
+    with open(path, "rb") as f:
+        contents = f.read()
+    baseline_kb = peak_rss_kb()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    if mode == "full":
+        # Previous behavior: full-resolution decode, RGB copy for MediaPipe, annotation copy
+        frame = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        annotated_frame = frame.copy()
+        buffers = (frame, img_rgb, annotated_frame)
+    elif mode == "bounded":
+        # Reduced-resolution decode, in-place RGB conversion, no annotation copy
+        frame = decode_rgb(contents, max_side)
+        buffers = (frame,)
+    elif mode == "bounded_annotated":
+        frame = decode_rgb(contents, max_side)
+        annotated_frame = to_bgr(frame, copy=True)
+        buffers = (frame, annotated_frame)
+    else:
+        raise SystemExit(f"Unknown mode {mode}")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _, traced_peak = tracemalloc.get_traced_memory()
+    peak_kb = peak_rss_kb()
+    print(json.dumps({
+        "mode": mode,
+        "decoded_shape": list(frame.shape),
+        "frame_buffers_mb": round(sum(buffer.nbytes for buffer in buffers) / (1024 * 1024), 1),
+        "decode_ms": round(elapsed_ms, 1),
+        "peak_rss_increase_mb": round((peak_kb - baseline_kb) / 1024, 1),
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 1),
+    }))
+
+
+def synthetic_jpeg(width=4000, height=3000):
+    """Smooth gradient image roughly as compressible as a real photo"""
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))], axis=-1)
+    handle, path = tempfile.mkstemp(suffix=".jpg")
+    os.close(handle)
+    cv2.imwrite(path, image.astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="image to ingest (default: synthetic 4000x3000 JPEG)")
+    parser.add_argument("--max-side", type=int, default=int(os.getenv("MAX_DECODE_SIDE", "1280")))
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.image, args.max_side)
+        return
+
+    path = args.image or synthetic_jpeg()
+    print(f"Image: {path} ({os.path.getsize(path) / 1e6:.2f} MB), max side {args.max_side}")
+    results = []
+    for mode in ("full", "bounded", "bounded_annotated"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--image", path, "--max-side", str(args.max_side)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+    if not args.image:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
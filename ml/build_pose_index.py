@@ -0,0 +1,39 @@
+"""
+Build the per-mudra reference pose index used by /hand_analysis?target=<mudra>.
+
+Runs MediaPipe over a dataset laid out like the CNN training data (one
+sub-folder per mudra, names matching class_names), then keeps up to
+--references representative hands per class (k-means medoids over the
+normalized landmark features) and saves them as one memory-mappable .npy file.
+
+    python build_pose_index.py --dataset-dir Bharatanatyam-Mudra-Dataset --output pose_index.npy
+"""
+import argparse
+import os
+
+from labels import class_names
+from pose_index import PoseIndex
+from train_landmark_classifier import extract_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset-dir", required=True)
+    parser.add_argument("--output", default="pose_index.npy")
+    parser.add_argument("--references", type=int, default=8, help="reference poses kept per mudra")
+    parser.add_argument("--seed", type=int, default=123)
+    args = parser.parse_args()
+
+    features, labels = extract_features(args.dataset_dir)
+    index = PoseIndex.build(features, labels, class_names, references=args.references, seed=args.seed)
+    counts = index.reference_counts()
+    missing = [name for name, count in zip(class_names, counts) if count == 0]
+    if missing:
+        print(f"Warning: no reference poses for {', '.join(missing)}")
+    index.save(args.output)
+    print(f"Saved {args.output}: {int(counts.sum())} reference poses for {len(class_names) - len(missing)} "
+          f"classes ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
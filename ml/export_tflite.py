@@ -0,0 +1,191 @@
+"""
+Convert best_mudra_model.keras to TFLite and report how each variant compares.
+
+Examples:
+    python export_tflite.py --quantize none float16 int8 --calibration-dir samples/
+    python export_tflite.py --quantize float16 int8 --calibration-dir samples/ --eval-dir dataset/ --report parity.json
+
+Sample directories may be flat or use one sub-folder per mudra (as in the
+training dataset); folder names matching class_names are used as labels.
+The chosen file is then served with INFERENCE_BACKEND=tflite TFLITE_MODEL_PATH=<file>.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from backends import KerasBackend, TFLiteBackend
+from labels import class_names
+from preprocessing import load_model_input
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def list_images(directory, limit=None, seed=123):
+    """Return (path, label_index or None) pairs found under directory"""
+    samples = []
+    for root, _, files in os.walk(directory):
+        label = os.path.basename(root)
+        label_index = class_names.index(label) if label in class_names else None
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(root, name), label_index))
+    samples.sort()
+    if limit and len(samples) > limit:
+        samples = random.Random(seed).sample(samples, limit)
+    return samples
+
+
+def load_image(path):
+    """Same preprocessing as the service (preprocessing.py), as float32 0-255"""
+    return load_model_input(path).astype(np.float32)
+
+
+def convert(model, quantize, calibration=None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        if not calibration:
+            raise SystemExit("int8 quantization needs --calibration-dir with sample images")
+
+        def representative_dataset():
+            for path, _ in calibration:
+                yield [np.expand_dims(load_image(path), axis=0)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def current_rss_mb():
+    """Resident set size of this process (Linux only)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def measure(backend_factory, images, warmup=3):
+    """Load a backend and run every image at batch size 1, collecting probabilities and timings"""
+    rss_before = current_rss_mb()
+    backend = backend_factory()
+    rss_after = current_rss_mb()
+
+    for image in images[:warmup]:
+        backend.predict(image[np.newaxis])
+
+    probs, latencies = [], []
+    for image in images:
+        started = time.perf_counter()
+        probs.append(backend.predict(image[np.newaxis])[0])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies = np.array(latencies)
+    stats = {
+        "latency_ms_mean": round(float(latencies.mean()), 3),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+        "load_rss_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+    }
+    return np.array(probs), stats
+
+
+def compare(reference, candidate, labels):
+    """Top-1/top-3 agreement of candidate against the reference (Keras) predictions"""
+    ref_top1 = reference.argmax(axis=1)
+    cand_top1 = candidate.argmax(axis=1)
+    ref_top3 = np.argsort(reference, axis=1)[:, -3:]
+    cand_top3 = np.argsort(candidate, axis=1)[:, -3:]
+
+    top3_same = np.array([set(r) == set(c) for r, c in zip(ref_top3, cand_top3)])
+    report = {
+        "top1_agreement": round(float((ref_top1 == cand_top1).mean()), 4),
+        "top3_agreement": round(float(top3_same.mean()), 4),
+        "top1_in_top3": round(float(np.mean([r in c for r, c in zip(ref_top1, cand_top3)])), 4),
+        "max_abs_prob_diff": round(float(np.abs(reference - candidate).max()), 4),
+    }
+
+    # Per-class top-1 agreement, grouped by the Keras prediction
+    per_class = {}
+    for i, name in enumerate(class_names):
+        mask = ref_top1 == i
+        if mask.any():
+            per_class[name] = round(float((cand_top1[mask] == i).mean()), 4)
+    report["per_class_top1_agreement"] = per_class
+
+    labelled = np.array([label is not None for label in labels])
+    if labelled.any():
+        truth = np.array([label for label in labels if label is not None])
+        report["accuracy"] = round(float((cand_top1[labelled] == truth).mean()), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="best_mudra_model.keras")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--quantize", nargs="+", choices=["none", "float16", "int8"], default=["none"])
+    parser.add_argument("--calibration-dir", help="sample images for int8 calibration")
+    parser.add_argument("--num-calibration", type=int, default=200)
+    parser.add_argument("--eval-dir", help="images for the parity report (defaults to the calibration set)")
+    parser.add_argument("--num-eval", type=int, default=500)
+    parser.add_argument("--report", help="write the parity/latency report as JSON to this path")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    args = parser.parse_args()
+
+    rss_before = current_rss_mb()
+    keras_backend = KerasBackend(args.model)
+    keras_load_rss = current_rss_mb() - rss_before if rss_before is not None else None
+    calibration = list_images(args.calibration_dir, args.num_calibration) if args.calibration_dir else None
+
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    exported = {}
+    for quantize in args.quantize:
+        suffix = "" if quantize == "none" else f"_{quantize}"
+        path = os.path.join(args.output_dir, f"{stem}{suffix}.tflite")
+        with open(path, "wb") as f:
+            f.write(convert(keras_backend.model, quantize, calibration))
+        exported[quantize] = path
+        print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+
+    eval_dir = args.eval_dir or args.calibration_dir
+    if not eval_dir:
+        return
+
+    samples = list_images(eval_dir, args.num_eval)
+    images = [load_image(path) for path, _ in samples]
+    labels = [label for _, label in samples]
+    print(f"Comparing variants on {len(images)} images")
+
+    reference, keras_stats = measure(lambda: keras_backend, images)
+    keras_stats["size_mb"] = round(os.path.getsize(args.model) / 1e6, 2)
+    keras_stats["load_rss_mb"] = round(keras_load_rss, 1) if keras_load_rss is not None else None
+    report = {"num_images": len(images), "variants": {"keras": {**keras_stats, **compare(reference, reference, labels)}}}
+
+    for quantize, path in exported.items():
+        probs, stats = measure(lambda: TFLiteBackend(path, num_threads=args.threads), images)
+        stats["size_mb"] = round(os.path.getsize(path) / 1e6, 2)
+        stats["path"] = path
+        report["variants"][f"tflite_{quantize}"] = {**stats, **compare(reference, probs, labels)}
+
+    print(f"{'variant':<18}{'size MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'top-1':>8}{'top-3':>8}")
+    for name, v in report["variants"].items():
+        print(f"{name:<18}{v['size_mb']:>9}{v['latency_ms_p50']:>9}{v['latency_ms_p95']:>9}"
+              f"{v['top1_agreement']:>8}{v['top3_agreement']:>8}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
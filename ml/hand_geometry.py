@@ -0,0 +1,101 @@
+import numpy as np
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+# (a, b, c) landmark triples; the angle is measured at b
+JOINT_TRIPLES = np.array([
+    (0, 1, 2), (1, 2, 3), (2, 3, 4),          # Thumb CMC, MCP, IP
+    (0, 5, 6), (5, 6, 7), (6, 7, 8),          # Index MCP, PIP, DIP
+    (0, 9, 10), (9, 10, 11), (10, 11, 12),    # Middle
+    (0, 13, 14), (13, 14, 15), (14, 15, 16),  # Ring
+    (0, 17, 18), (17, 18, 19), (18, 19, 20),  # Little
+])
+
+JOINT_NAMES = [
+    "Thumb_CMC", "Thumb_MCP", "Thumb_IP",
+    "Index_MCP", "Index_PIP", "Index_DIP",
+    "Middle_MCP", "Middle_PIP", "Middle_DIP",
+    "Ring_MCP", "Ring_PIP", "Ring_DIP",
+    "Little_MCP", "Little_PIP", "Little_DIP",
+]
+
+# Joint that drives each finger's extension score (thumb MCP, finger PIP),
+# with the angle range mapped onto 0-100
+FINGER_NAMES = ["Thumb", "Index", "Middle", "Ring", "Little"]
+FINGER_SCORE_JOINTS = np.array([1, 4, 7, 10, 13])
+FINGER_ANGLE_MIN = np.array([40.0, 60.0, 60.0, 60.0, 60.0])
+FINGER_ANGLE_MAX = np.array([160.0, 180.0, 180.0, 180.0, 180.0])
+
+NUM_FEATURES = 21 * 3 + len(JOINT_TRIPLES)
+
+
+def landmark_array(hand_landmarks, width, height):
+    """
+    MediaPipe landmarks as a (21, 3) float32 array in pixel units.
+    x/y are normalized by image width/height, so they are scaled back to keep
+    the hand's aspect ratio; z uses the same scale as x.
+    """
+    return np.array(
+        [(lm.x * width, lm.y * height, lm.z * width) for lm in hand_landmarks.landmark],
+        dtype=np.float32,
+    )
+
+
+def hands_array(multi_hand_landmarks, width, height):
+    """All detected hands as one (hands, 21, 3) array in pixel units"""
+    if not multi_hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.stack([landmark_array(hand, width, height) for hand in multi_hand_landmarks])
+
+
+def normalize_landmarks(points, is_left=False):
+    """
+    Translation-, scale- and rotation-normalize a (..., 21, 3) landmark array.
+
+    The wrist is moved to the origin, the wrist -> middle-finger MCP vector is
+    rotated to point straight up (-y) in the image plane and scaled to unit
+    length. Left hands are mirrored so both hands share one coordinate frame.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    centered = points - points[..., WRIST:WRIST + 1, :]
+    if np.ndim(is_left) == 0:
+        is_left = np.full(points.shape[:-2], bool(is_left))
+    centered[..., 0] = np.where(np.asarray(is_left)[..., None], -centered[..., 0], centered[..., 0])
+
+    axis = centered[..., MIDDLE_MCP, :2]
+    scale = np.linalg.norm(centered[..., MIDDLE_MCP, :], axis=-1)
+    scale = np.where(scale > 1e-6, scale, 1.0)
+
+    # Rotate so that `axis` points straight up (-y)
+    angle = np.arctan2(-axis[..., 0], -axis[..., 1])
+    cos, sin = np.cos(angle)[..., None], np.sin(angle)[..., None]
+    x, y = centered[..., 0], centered[..., 1]
+    rotated = np.stack([x * cos - y * sin, x * sin + y * cos, centered[..., 2]], axis=-1)
+    return rotated / scale[..., None, None]
+
+
+def joint_angles(points):
+    """Angles in degrees at every JOINT_TRIPLES vertex for a (..., 21, 3) array"""
+    points = np.asarray(points, dtype=np.float32)
+    a = points[..., JOINT_TRIPLES[:, 0], :]
+    b = points[..., JOINT_TRIPLES[:, 1], :]
+    c = points[..., JOINT_TRIPLES[:, 2], :]
+    ba, bc = a - b, c - b
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    cos_angle = np.einsum("...i,...i->...", ba, bc) / np.where(norms > 1e-9, norms, 1.0)
+    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+
+def finger_confidences(angles):
+    """(..., 15) joint angles -> (..., 5) finger extension scores in 0-100"""
+    angles = np.asarray(angles)[..., FINGER_SCORE_JOINTS]
+    scores = (angles - FINGER_ANGLE_MIN) / (FINGER_ANGLE_MAX - FINGER_ANGLE_MIN) * 100
+    return np.round(np.clip(np.nan_to_num(scores), 0, 100), 2)
+
+
+def landmark_features(points, is_left=False):
+    """(..., NUM_FEATURES) vector: 63 normalized coordinates + joint angles scaled to 0-1"""
+    normalized = normalize_landmarks(points, is_left)
+    coords = normalized.reshape(*normalized.shape[:-2], 21 * 3)
+    return np.concatenate([coords, joint_angles(normalized) / 180.0], axis=-1).astype(np.float32)
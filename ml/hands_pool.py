@@ -0,0 +1,69 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class HandsPool:
+    """
+    Fixed-size pool of pre-initialized MediaPipe Hands detectors.
+
+    Building a `Hands` object loads its TFLite graphs, so the instances are
+    created (and warmed up) once and then checked out per request. With
+    `static_image_mode=True` each `process()` call is independent, so a reused
+    instance returns the same results as a freshly constructed one.
+    """
+
+    def __init__(self, factory, size=2, warmup=True):
+        self.size = max(1, int(size))
+        self._factory = factory
+        self._pool = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._waits = 0
+
+        for _ in range(self.size):
+            hands = factory()
+            self._all.append(hands)
+            self._pool.put(hands)
+        if warmup:
+            self.warm_up()
+
+    def warm_up(self, frame=None):
+        """Run one frame (blank by default) through every instance so graph initialization happens at startup"""
+        if frame is None:
+            frame = np.zeros((128, 128, 3), dtype=np.uint8)
+        for hands in self._all:
+            hands.process(frame)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow a detector for the duration of the with-block"""
+        try:
+            hands = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._waits += 1
+            hands = self._pool.get(timeout=timeout)
+        with self._lock:
+            self._checkouts += 1
+        try:
+            yield hands
+        finally:
+            self._pool.put(hands)
+
+    def close(self):
+        for hands in self._all:
+            hands.close()
+        self._all = []
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "available": self._pool.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+            }
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+
+def normalize_name(name):
+    """Cache key form of a mudra name: trimmed, case-folded, single-spaced"""
+    return " ".join(name.split()).casefold()
+
+
+class MudraInfoCache:
+    """
+    Persistent SQLite cache for /mudra_info details.
+
+    Entries are keyed by normalized mudra name and prompt version, so changing
+    the prompt invalidates old answers, and expire after `ttl_seconds`.
+    Concurrent misses for the same key share a single upstream fetch. Only
+    successful fetches are stored; errors are passed to every waiter uncached.
+    """
+
+    def __init__(self, path, prompt_version, ttl_seconds=30 * 24 * 3600):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS mudra_info (
+                name TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (name, prompt_version)
+            )"""
+        )
+        self._conn.commit()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def get(self, name):
+        """Return the cached details dict, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created_at FROM mudra_info WHERE name = ? AND prompt_version = ?",
+                (normalize_name(name), self.prompt_version),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def set(self, name, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mudra_info (name, prompt_version, data, created_at) VALUES (?, ?, ?, ?)",
+                (normalize_name(name), self.prompt_version, json.dumps(data), time.time()),
+            )
+            self._conn.commit()
+
+    def lookup(self, name):
+        """Cached details for name counted as a hit, or None"""
+        cached = self.get(name)
+        if cached is not None:
+            self.hits += 1
+        return cached
+
+    def claim(self, name):
+        """
+        Register a miss for name. Returns (future, owner): when owner is True
+        the caller must produce the details and call resolve(); otherwise
+        another caller is already fetching and the future gets its result.
+        """
+        key = normalize_name(name)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return pending, False
+
+        self.misses += 1
+        pending = asyncio.get_running_loop().create_future()
+        # Avoid "exception was never retrieved" when nobody else was waiting
+        pending.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = pending
+        return pending, True
+
+    def resolve(self, name, data=None, error=None):
+        """Finish a claim(): cache and share data, or pass error on to the waiters uncached"""
+        pending = self._inflight.pop(normalize_name(name))
+        if error is None:
+            self.set(name, data)
+            pending.set_result(data)
+        elif isinstance(error, Exception):
+            self.errors += 1
+            pending.set_exception(error)
+        else:
+            # The owner was cancelled or closed before finishing; waiters take over (see wait())
+            pending.cancel()
+
+    @staticmethod
+    async def wait(pending):
+        """
+        Result of another caller's claim, or None when that caller was cancelled
+        before finishing, in which case the waiter should claim() again.
+        Errors from the fetch are raised as they are.
+        """
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if pending.cancelled():
+                return None
+            raise
+
+    async def get_or_fetch(self, name, fetch):
+        """
+        Return cached details for name, or await fetch() (an async callable
+        returning a details dict) once for all concurrent callers and cache it.
+        """
+        cached = self.lookup(name)
+        if cached is not None:
+            return cached
+
+        while True:
+            pending, owner = self.claim(name)
+            if owner:
+                break
+            data = await self.wait(pending)
+            if data is not None:
+                return data
+        try:
+            data = await fetch()
+        except BaseException as e:
+            self.resolve(name, error=e)
+            raise
+        self.resolve(name, data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM mudra_info WHERE prompt_version = ?", (self.prompt_version,)
+            ).fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
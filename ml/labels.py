@@ -0,0 +1,12 @@
+# Shared model constants, importable without loading TensorFlow
+IMG_SIZE = (128, 128)
+class_names = ['Alapadmam', 'Anjali', 'Aralam', 'Ardhachandran', 'Ardhapathaka',
+               'Berunda', 'Bramaram', 'Chakra', 'Chandrakala', 'Chaturam',
+               'Garuda', 'Hamsapaksha', 'Hamsasyam', 'Kangulam', 'Kapith',
+               'Kapotham', 'Karkatta', 'Kartariswastika', 'Kartrimukha', 'Katakamukha',
+               'Katakavardhana', 'Katrimukha', 'Khatva', 'Kilaka', 'Kurma',
+               'Matsya', 'Mayura', 'Mrigasirsha', 'Mukulam', 'Mushti',
+               'Nagabandha', 'Padmakosha', 'Pasha', 'Pathaka', 'Pushpaputa',
+               'Sakata', 'Samputa', 'Sandamsha', 'Sarpasirsha', 'Shanka',
+               'Shivalinga', 'Shukatundam', 'Sikharam', 'Simhamukham', 'Suchi',
+               'Swastikam', 'Tamarachudam', 'Tripathaka', 'Trishulam', 'Varaha']
@@ -0,0 +1,59 @@
+import numpy as np
+
+from hand_geometry import NUM_FEATURES
+
+
+class LandmarkClassifier:
+    """
+    Softmax regression over hand_geometry.landmark_features.
+
+    Fitted offline by train_landmark_classifier.py and stored as a small .npz
+    file. Classifying a hand is a single (NUM_FEATURES x classes) matrix
+    product, so it costs microseconds instead of a CNN forward pass.
+    """
+
+    def __init__(self, weights, bias, mean, std, class_names):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.class_names = list(class_names)
+
+    @classmethod
+    def load(cls, path, expected_classes=None):
+        data = np.load(path)
+        classifier = cls(data["weights"], data["bias"], data["mean"], data["std"], data["class_names"].tolist())
+        if classifier.weights.shape[0] != NUM_FEATURES:
+            raise ValueError(f"{path} was fitted on {classifier.weights.shape[0]} features, expected {NUM_FEATURES}")
+        if expected_classes is not None and classifier.class_names != list(expected_classes):
+            raise ValueError(f"{path} was fitted on a different class list than the service uses")
+        return classifier
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, std=self.std,
+                 class_names=np.array(self.class_names))
+
+    def predict(self, features):
+        """(n, NUM_FEATURES) -> (n, classes) probabilities"""
+        logits = ((np.asarray(features, dtype=np.float32) - self.mean) / self.std) @ self.weights + self.bias
+        logits -= logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    @classmethod
+    def fit(cls, features, labels, class_names, epochs=2000, learning_rate=0.5, l2=1e-4):
+        """Full-batch gradient descent on the cross-entropy loss"""
+        features = np.asarray(features, dtype=np.float32)
+        labels = np.asarray(labels)
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-6
+        x = (features - mean) / std
+        onehot = np.eye(len(class_names), dtype=np.float32)[labels]
+
+        classifier = cls(np.zeros((x.shape[1], len(class_names))), np.zeros(len(class_names)), mean, std, class_names)
+        for _ in range(epochs):
+            probs = classifier.predict(features)
+            grad = (probs - onehot) / len(x)
+            classifier.weights -= learning_rate * (x.T @ grad + l2 * classifier.weights)
+            classifier.bias -= learning_rate * grad.sum(axis=0)
+        return classifier
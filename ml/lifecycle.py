@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Component:
+    """One startup step: load() then an optional warmup(), with timings and state"""
+
+    def __init__(self, name, load, warmup=None, required=True, depends_on=()):
+        self.name = name
+        self.load = load
+        self.warmup = warmup
+        self.required = required
+        self.depends_on = tuple(depends_on)
+        self.state = "pending"
+        self.error = None
+        self.load_ms = None
+        self.warmup_ms = None
+        self.done = threading.Event()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "required": self.required,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "error": self.error,
+        }
+
+
+class Lifecycle:
+    """
+    Loads the service's components in parallel on background threads and
+    tracks their state (pending -> loading -> warming -> ready | failed).
+
+    The process is live as soon as it can answer HTTP; it is ready once every
+    required component has loaded and warmed up. Optional components (for
+    example an external API client) may fail without blocking readiness.
+    cold_start_ms is measured from construction, i.e. app import.
+    """
+
+    def __init__(self):
+        self._created = time.perf_counter()
+        self._components = {}
+        self._ready_at = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def register(self, name, load, warmup=None, required=True, depends_on=()):
+        self._components[name] = Component(name, load, warmup, required, depends_on)
+
+    def start(self):
+        """Begin loading every registered component; returns immediately"""
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self._components)),
+                                            thread_name_prefix="startup")
+        for component in self._components.values():
+            self._executor.submit(self._run, component)
+        self._executor.shutdown(wait=False)
+
+    def wait(self, timeout=None):
+        """Block until every component has finished loading (or failed); returns ready"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for component in self._components.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            component.done.wait(remaining)
+        return self.ready
+
+    def _run(self, component):
+        try:
+            for name in component.depends_on:
+                dependency = self._components[name]
+                dependency.done.wait()
+                if dependency.state != "ready":
+                    raise RuntimeError(f"dependency '{name}' is {dependency.state}")
+
+            component.state = "loading"
+            started = time.perf_counter()
+            resource = component.load()
+            component.load_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            if component.warmup is not None:
+                component.state = "warming"
+                started = time.perf_counter()
+                component.warmup(resource)
+                component.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+            component.state = "ready"
+        except Exception as e:
+            component.state = "failed"
+            component.error = str(e)
+            level = "Error" if component.required else "Warning"
+            print(f"{level}: startup component '{component.name}' failed: {e}", file=sys.stderr)
+        finally:
+            component.done.set()
+            self._check_ready()
+
+    def _check_ready(self):
+        with self._lock:
+            if self._ready_at is None and self.ready:
+                self._ready_at = time.perf_counter()
+
+    def component_ready(self, name):
+        component = self._components.get(name)
+        return component is not None and component.state == "ready"
+
+    @property
+    def ready(self):
+        components = self._components.values()
+        return bool(components) and all(c.state == "ready" for c in components if c.required)
+
+    def status(self):
+        with self._lock:
+            ready_at = self._ready_at
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.perf_counter() - self._created, 1),
+            "cold_start_ms": round((ready_at - self._created) * 1000, 1) if ready_at else None,
+            "components": {name: c.status() for name, c in self._components.items()},
+        }
@@ -0,0 +1,74 @@
+import asyncio
+import base64
+
+
+class LiveSession:
+    """
+    Per-connection state for the live webcam stream.
+
+    Each session owns a MediaPipe Hands instance in tracking mode
+    (`static_image_mode=False`) so palm detection only reruns when tracking is
+    lost. Only the newest unprocessed frame is kept: if the client sends faster
+    than the server can analyze, older pending frames are dropped.
+    """
+
+    def __init__(self, hands):
+        self.hands = hands
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self._latest = None
+        self._closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, data):
+        """Store an incoming frame, replacing any frame not yet picked up"""
+        self.received += 1
+        if self._latest is not None:
+            self.dropped += 1
+        self._latest = (self.received, data)
+        self._ready.set()
+
+    def end_stream(self):
+        self._closed = True
+        self._ready.set()
+
+    async def next_frame(self):
+        """Wait for the newest frame; returns None once the client has gone"""
+        while self._latest is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame = self._latest
+        self._latest = None
+        return frame
+
+    def close(self):
+        self.hands.close()
+
+
+def decode_message(message):
+    """Extract raw image bytes from a websocket message (binary or base64 text)"""
+    if message.get("bytes") is not None:
+        return message["bytes"]
+    text = message.get("text")
+    if not text:
+        return None
+    # Accept data URLs as produced by canvas.toDataURL()
+    if text.startswith("data:"):
+        text = text.split(",", 1)[-1]
+    try:
+        return base64.b64decode(text)
+    except ValueError:
+        return None
+
+
+def landmarks_to_list(multi_hand_landmarks):
+    """Normalized (x, y, z) landmark coordinates keyed like finger_confidence"""
+    if not multi_hand_landmarks:
+        return {}
+    return {
+        f"hand_{hand_no + 1}": [[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]
+        for hand_no, hand_landmarks in enumerate(multi_hand_landmarks)
+    }
@@ -0,0 +1,177 @@
+"""
+Model server process for multi-worker serving (see serve.py).
+
+One process owns the TensorFlow/TFLite model; HTTP worker processes send it
+batches through RemoteBackend. Each client allocates one shared-memory block
+holding a uint8 input region (max_batch x 128 x 128 x 3) and a float32 output
+region (max_batch x num_classes). Per batch only a tiny ("predict", n) message
+crosses the socket; pixels and probabilities never get pickled.
+
+Run standalone:
+    python model_server.py --address /tmp/mudra-model-0.sock
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from labels import IMG_SIZE, class_names
+
+IMAGE_SHAPE = (*IMG_SIZE, 3)
+
+
+def _authkey():
+    return os.getenv("MODEL_SERVER_AUTHKEY", "mudra-model-server").encode()
+
+
+def _regions(shm, max_batch):
+    """uint8 input and float32 output views over one shared-memory block"""
+    input_size = max_batch * int(np.prod(IMAGE_SHAPE))
+    inputs = np.ndarray((max_batch, *IMAGE_SHAPE), dtype=np.uint8, buffer=shm.buf)
+    outputs = np.ndarray((max_batch, len(class_names)), dtype=np.float32, buffer=shm.buf, offset=input_size)
+    return inputs, outputs
+
+
+def _block_size(max_batch):
+    return max_batch * (int(np.prod(IMAGE_SHAPE)) + len(class_names) * 4)
+
+
+def _attach(name):
+    """Open a client's block without letting this process's resource tracker unlink it on exit"""
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class RemoteBackend:
+    """
+    Inference backend that forwards batches to a model_server process.
+
+    Drop-in for KerasBackend/TFLiteBackend: predict() takes a float32 batch in
+    the 0-255 range (values are whole numbers, as produced by model_input) and
+    returns probabilities. Connecting retries until the server is up, so HTTP
+    workers can start while the model is still loading.
+    """
+
+    name = "remote"
+
+    def __init__(self, address, max_batch_size=16, connect_timeout=300.0):
+        self.address = address
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._conn = self._connect(address, connect_timeout)
+        self._shm = SharedMemory(create=True, size=_block_size(self.max_batch_size))
+        self._inputs, self._outputs = _regions(self._shm, self.max_batch_size)
+        self._lock = threading.Lock()
+        self._conn.send(("attach", self._shm.name, self.max_batch_size))
+        self._check(self._conn.recv())
+
+    @staticmethod
+    def _connect(address, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return Client(address, family="AF_UNIX", authkey=_authkey())
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    @staticmethod
+    def _check(reply):
+        if reply[0] != "ok":
+            raise RuntimeError(f"Model server error: {reply[1]}")
+
+    def predict(self, batch):
+        if len(batch) > self.max_batch_size:
+            return np.concatenate([self.predict(batch[i:i + self.max_batch_size])
+                                   for i in range(0, len(batch), self.max_batch_size)])
+        n = len(batch)
+        with self._lock:
+            np.copyto(self._inputs[:n], batch, casting="unsafe")
+            self._conn.send(("predict", n))
+            self._check(self._conn.recv())
+            return self._outputs[:n].copy()
+
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            self._shm.close()
+            self._shm.unlink()
+
+
+def _serve_client(conn, backend, predict_lock):
+    shm = None
+    try:
+        _, name, max_batch = conn.recv()
+        shm = _attach(name)
+        inputs, outputs = _regions(shm, max_batch)
+        conn.send(("ok",))
+        while True:
+            _, n = conn.recv()
+            try:
+                # Clients share one backend; the TFLite interpreter is single-threaded
+                with predict_lock:
+                    outputs[:n] = backend.predict(inputs[:n].astype(np.float32))
+            except Exception as e:
+                conn.send(("error", str(e)))
+            else:
+                conn.send(("ok",))
+    except EOFError:
+        pass
+    finally:
+        conn.close()
+        if shm is not None:
+            shm.close()
+
+
+def serve(address, backend_kind="keras", model_path="best_mudra_model.keras",
+          tflite_path="best_mudra_model.tflite", intra_op_threads=None, inter_op_threads=None, cpus=None,
+          compiled=True, jit_compile=False, max_batch_size=16):
+    """Load the model, warm it up, then serve clients (one thread each, one forward pass at a time) until killed"""
+    from backends import load_backend, warm_batch_sizes
+
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    started = time.perf_counter()
+    backend = load_backend(backend_kind, model_path, tflite_path,
+                           num_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                           compiled=compiled, jit_compile=jit_compile)
+    for size in warm_batch_sizes(max_batch_size):
+        backend.predict(np.zeros((size, *IMAGE_SHAPE), dtype=np.float32))
+    if os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, family="AF_UNIX", authkey=_authkey())
+    print(f"Model server ready on {address} in {time.perf_counter() - started:.1f}s "
+          f"(backend={backend.name}, cpus={sorted(os.sched_getaffinity(0))})", file=sys.stderr)
+    predict_lock = threading.Lock()
+    try:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_serve_client, args=(conn, backend, predict_lock), daemon=True).start()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=os.getenv("MODEL_SERVER_ADDRESS", "/tmp/mudra-model-0.sock"))
+    parser.add_argument("--backend", default=os.getenv("INFERENCE_BACKEND", "keras"), choices=["keras", "tflite"])
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "best_mudra_model.keras"))
+    parser.add_argument("--tflite-model", default=os.getenv("TFLITE_MODEL_PATH", "best_mudra_model.tflite"))
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--inter-op-threads", type=int, default=None)
+    parser.add_argument("--xla", action="store_true", default=os.getenv("TF_XLA", "false").lower() in ("1", "true", "yes"),
+                        help="XLA-compile the Keras forward pass")
+    args = parser.parse_args()
+    serve(args.address, args.backend, args.model, args.tflite_model, args.intra_op_threads, args.inter_op_threads,
+          jit_compile=args.xla)
@@ -0,0 +1,441 @@
+"""
+Gemini-backed mudra descriptions used by /mudra_info.
+
+Run directly to pre-fill the persistent cache for every class:
+    python mudra_info.py --warm-cache
+"""
+import argparse
+import asyncio
+import json # To parse the Gemini output
+import os
+import sys # For error logging
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from info_cache import MudraInfoCache
+from metrics import GEMINI_ERRORS, GEMINI_SECONDS
+from labels import class_names
+
+load_dotenv()
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Async client limits (see GeminiFetcher); GEMINI_HEDGE_PERCENTILE=0 disables hedging
+GEMINI_TIMEOUT_S = float(os.getenv("GEMINI_TIMEOUT_S", "20"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0"))
+# Offline stub instead of the real API (local development, benchmarks)
+GEMINI_STUB = os.getenv("GEMINI_STUB", "false").lower() in ("1", "true", "yes")
+GEMINI_STUB_LATENCY_MS = float(os.getenv("GEMINI_STUB_LATENCY_MS", "300"))
+
+# Gemini client, created on first use (or by the app's startup loader) so
+# importing this module does not pay for the google-genai import
+client = None
+_client_error = None
+_client_lock = threading.Lock()
+
+# Bump whenever the prompt or schema changes so cached answers are refreshed
+PROMPT_VERSION = "v1"
+
+MUDRA_INFO_CACHE_PATH = os.getenv("MUDRA_INFO_CACHE_PATH", "mudra_info_cache.db")
+MUDRA_INFO_CACHE_TTL = float(os.getenv("MUDRA_INFO_CACHE_TTL", str(30 * 24 * 3600)))
+
+
+class GeminiUnavailableError(RuntimeError):
+    """Raised when no Gemini client could be initialized"""
+
+
+# Define the data structure we want Gemini to return
+class MudraDetails(BaseModel):
+    meaning: str = Field(description="A single paragraph explanation of the mudra's meaning and cultural significance.")
+    innerThought: str = Field(description="A short, concise phrase representing the emotion or concept associated with the mudra.")
+    commonMistakes: list[str] = Field(description="A list of 3 common mistakes beginners make when performing this mudra.")
+
+
+def init_client():
+    """Create the Gemini client once; raises GeminiUnavailableError if that fails"""
+    global client, _client_error
+    with _client_lock:
+        if client is None and _client_error is None:
+            try:
+                if GEMINI_STUB:
+                    client = StubGeminiClient(GEMINI_STUB_LATENCY_MS)
+                else:
+                    from google import genai
+                    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+            except Exception as e:
+                print(f"Warning: Could not initialize Gemini client. Ensure API key is set. Error: {e}", file=sys.stderr)
+                _client_error = str(e)
+    if client is None:
+        raise GeminiUnavailableError(f"Gemini client not initialized. Check API key setup. Error: {_client_error}")
+    return client
+
+
+def gemini_request(mudra_name):
+    """Prompt and structured-output config for one mudra"""
+    # 1. Construct the detailed prompt
+    prompt = f"""
+    You are an expert in classical Indian dance (Bharatanatyam/Kathak).
+    Provide the cultural meaning, associated inner thought/emotion, and a list of 3 common beginner mistakes for the hand gesture (Mudra) called **{mudra_name}**.
+    Your output MUST strictly follow the requested JSON schema.
+    """
+
+    # 2. Define the response configuration to force JSON output
+    # We use the schema generated from the Pydantic model MudraDetails
+    response_schema = MudraDetails.model_json_schema()
+
+    config = {
+        "response_mime_type": "application/json",
+        "response_schema": response_schema
+    }
+    return [prompt], config
+
+
+def parse_details(response):
+    """Validate a generate_content response into MudraDetails"""
+    # The result.text is guaranteed to be a JSON string matching the schema
+    gemini_json_str = response.text.strip()
+    details_data = json.loads(gemini_json_str)
+    return MudraDetails(**details_data)
+
+
+class JsonFieldStream:
+    """
+    Incremental reader for one JSON object arriving in text chunks: feed()
+    returns the top-level (key, value) members completed so far, so a field
+    can be used before the rest of the object has been generated.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        members = []
+        for i in range(self._pos, len(self.text)):
+            c = self.text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif c in "}]" or (c == "," and self._depth == 1):
+                if self._depth == 1:
+                    member = self.text[self._member_start:i].strip()
+                    if member:
+                        members.extend(json.loads("{" + member + "}").items())
+                    self._member_start = i + 1
+                if c != ",":
+                    self._depth -= 1
+                    self.complete = self._depth == 0
+        self._pos = len(self.text)
+        return members
+
+    def close(self):
+        if not self.complete:
+            raise ValueError("Gemini stream ended before the JSON object was complete")
+
+
+def fetch_mudra_details(mudra_name):
+    """
+    Queries the Gemini API for descriptive details about a given Mudra name.
+    The response is forced into the MudraDetails JSON structure. Blocking;
+    the app uses GeminiFetcher instead.
+    """
+    client = init_client()
+    contents, config = gemini_request(mudra_name)
+
+    started = time.perf_counter()
+    try:
+        # 3. Call the Gemini API with structured output configuration
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config
+        )
+        # 4. Parse and validate the JSON response
+        details = parse_details(response)
+    except Exception as e:
+        GEMINI_SECONDS.observe(time.perf_counter() - started, outcome="error")
+        GEMINI_ERRORS.inc(error=type(e).__name__)
+        raise
+    GEMINI_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+    return details
+
+
+class GeminiFetcher:
+    """
+    Non-blocking /mudra_info lookups on the client's async API (client.aio),
+    which keeps one pooled HTTP connection set for the whole process.
+
+    - every attempt is bounded by timeout seconds,
+    - at most max_concurrency attempts are in flight process-wide; callers
+      beyond that wait on the event loop instead of piling onto Gemini,
+    - with hedge_percentile set (e.g. 95), an attempt still running after that
+      percentile of recent successful latencies gets a second, parallel attempt;
+      the first valid answer wins and the other is cancelled. A failed attempt
+      is also retried right away once. Hedges only fire when a slot is free.
+
+    stream() serves the same lookups field by field.
+    """
+
+    def __init__(self, timeout=20.0, max_concurrency=8, hedge_percentile=0.0, min_samples=20, window=200):
+        self.timeout = timeout
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._slots = None
+        self.in_flight = 0
+        self.calls = 0
+        self.streams = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def _semaphore(self):
+        # Created lazily so it belongs to the serving event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    def hedge_delay(self):
+        """Seconds before a hedge fires, or None while disabled or without enough samples"""
+        if not self.hedge_percentile or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _attempt(self, mudra_name, wait_for_slot=True):
+        slots = self._semaphore()
+        if not wait_for_slot and slots.locked():
+            return None
+        async with slots:
+            client = init_client()
+            contents, config = gemini_request(mudra_name)
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    client.aio.models.generate_content(model=GEMINI_MODEL, contents=contents, config=config),
+                    self.timeout,
+                )
+                details = parse_details(response)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                GEMINI_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                GEMINI_ERRORS.inc(error=type(e).__name__)
+                raise
+            finally:
+                self.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            GEMINI_SECONDS.observe(elapsed, outcome="ok")
+            self._latencies.append(elapsed)
+            return details
+
+    async def fetch(self, mudra_name):
+        """MudraDetails for mudra_name; raises the last error if every attempt fails"""
+        self.calls += 1
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(self._attempt(mudra_name))
+        if delay is None:
+            return await primary
+
+        attempts = {primary}
+        hedged = False
+        error = None
+        try:
+            while attempts:
+                done, attempts = await asyncio.wait(
+                    attempts, timeout=None if hedged else delay, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None and attempt.result() is not None:
+                        if attempt is not primary:
+                            self.hedge_wins += 1
+                        return attempt.result()
+                    error = attempt.exception() or error
+                if not hedged:
+                    # Slow (timed out waiting) or failed first attempt: fire one more
+                    hedged = True
+                    hedge = asyncio.ensure_future(self._attempt(mudra_name, wait_for_slot=bool(error)))
+                    attempts.add(hedge)
+                    self.hedges += 1
+            raise error or GeminiUnavailableError("No Gemini slot free for the hedged request")
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def stream(self, mudra_name):
+        """
+        Async generator of the (field, value) pairs of a streamed Gemini answer,
+        each yielded as soon as its JSON member is complete. Shares the
+        concurrency cap and timeout with fetch() but is never hedged: fields
+        already sent cannot be swapped for a faster attempt. Raises if the
+        stream fails or ends early; the caller validates the fields.
+        """
+        async with self._semaphore():
+            client = init_client()
+            contents, config = gemini_request(mudra_name)
+            self.streams += 1
+            self.in_flight += 1
+            started = time.perf_counter()
+            parser = JsonFieldStream()
+            try:
+                chunks = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(model=GEMINI_MODEL, contents=contents, config=config),
+                    self.timeout,
+                )
+                async with aclosing(chunks):
+                    while True:
+                        remaining = self.timeout - (time.perf_counter() - started)
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, remaining))
+                        except StopAsyncIteration:
+                            break
+                        for member in parser.feed(chunk.text or ""):
+                            yield member
+                parser.close()
+            except (asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                GEMINI_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                GEMINI_ERRORS.inc(error=type(e).__name__)
+                raise
+            finally:
+                self.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            GEMINI_SECONDS.observe(elapsed, outcome="ok")
+            self._latencies.append(elapsed)
+
+    def stats(self):
+        delay = self.hedge_delay()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "timeout_s": self.timeout,
+            "calls": self.calls,
+            "streams": self.streams,
+            "timeouts": self.timeouts,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class StubGeminiClient:
+    """
+    Offline stand-in for genai.Client (GEMINI_STUB=true, benchmarks): answers
+    every request with schema-valid MudraDetails JSON after latency_ms, through
+    both the blocking (models) and async (aio.models) APIs. Streams spread the
+    latency over a few chunks.
+    """
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    class _AsyncModels:
+        def __init__(self, stub):
+            self._stub = stub
+
+        async def generate_content(self, model, contents, config):
+            await asyncio.sleep(self._stub.latency)
+            return self._stub._response()
+
+        async def generate_content_stream(self, model, contents, config, chunks=6):
+            text = self._stub._response().text
+            size = -(-len(text) // chunks)
+
+            async def stream():
+                for start in range(0, len(text), size):
+                    await asyncio.sleep(self._stub.latency / chunks)
+                    yield StubGeminiClient._Response(text[start:start + size])
+            return stream()
+
+    def __init__(self, latency_ms=300.0):
+        self.latency = latency_ms / 1000.0
+        self.models = self
+        self.aio = type("Aio", (), {})()
+        self.aio.models = self._AsyncModels(self)
+
+    def _response(self):
+        return self._Response(json.dumps({
+            "meaning": "Offline stub description.",
+            "innerThought": "Stub",
+            "commonMistakes": ["One", "Two", "Three"],
+        }))
+
+    def generate_content(self, model, contents, config):
+        time.sleep(self.latency)
+        return self._response()
+
+
+def fallback_details(mudra_name):
+    """Response used when Gemini fails; never cached"""
+    return MudraDetails(
+        meaning="Details unavailable due to an external service error.",
+        innerThought=f"Could not retrieve details for {mudra_name}.",
+        commonMistakes=["Check server logs for Gemini API error."]
+    )
+
+
+def open_fetcher():
+    return GeminiFetcher(GEMINI_TIMEOUT_S, GEMINI_MAX_CONCURRENCY, GEMINI_HEDGE_PERCENTILE)
+
+
+def open_cache():
+    return MudraInfoCache(MUDRA_INFO_CACHE_PATH, PROMPT_VERSION, ttl_seconds=MUDRA_INFO_CACHE_TTL)
+
+
+def warm_cache(cache, names=class_names):
+    """Fetch and store details for every name that is not cached yet. Blocking."""
+    filled = 0
+    for name in names:
+        if cache.get(name) is not None:
+            continue
+        try:
+            cache.set(name, fetch_mudra_details(name).model_dump())
+            filled += 1
+        except Exception as e:
+            print(f"Error warming mudra info for {name}: {e}", file=sys.stderr)
+    return filled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warm-cache", action="store_true", help="pre-fill the cache for all class_names")
+    args = parser.parse_args()
+
+    if args.warm_cache:
+        cache = open_cache()
+        filled = warm_cache(cache)
+        print(f"Cached {filled} new entries, {cache.stats()['entries']} of {len(class_names)} classes available")
+        cache.close()
+    else:
+        parser.print_help()
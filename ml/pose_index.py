@@ -0,0 +1,134 @@
+import numpy as np
+
+from hand_geometry import FINGER_NAMES, FINGER_SCORE_JOINTS, NUM_FEATURES, landmark_features
+
+# landmark_features layout: 21 normalized (x, y, z) points, then the 15 joint angles / 180
+ANGLE_OFFSET = 21 * 3
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+# Joint-angle columns of each finger (three joints per finger, thumb first)
+FINGER_JOINTS = np.arange(15).reshape(5, 3)
+
+
+def _medoids(x, k, iterations, rng):
+    """Up to k real rows of x that best represent it (k-means, then each center snapped to its nearest row)"""
+    if len(x) <= k:
+        return x
+    centers = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = ((x[:, None] - centers[None]) ** 2).sum(axis=-1).argmin(axis=1)
+        for j in range(k):
+            members = x[assign == j]
+            if len(members):
+                centers[j] = members.mean(axis=0)
+    nearest = ((x[:, None] - centers[None]) ** 2).sum(axis=-1).argmin(axis=0)
+    return x[np.unique(nearest)]
+
+
+class PoseIndex:
+    """
+    Reference hand poses for every mudra, used to score a user's hand against
+    a target mudra during assessment.
+
+    The index is one (classes, references, NUM_FEATURES) float32 array of
+    landmark_features signatures, built offline by build_pose_index.py and
+    stored as a .npy file in class_names order. Classes with fewer references
+    are padded with NaN rows. load() memory-maps the file, so startup reads
+    nothing up front and worker processes share its pages.
+
+    score() compares hands with all references of the target in one
+    vectorized pass. It takes the absolute joint-angle differences, averages
+    them per finger, and reports the closest reference. A similarity of 100
+    means identical angles; it falls to 37 (1/e) at a mean deviation of
+    tolerance_deg.
+    """
+
+    def __init__(self, references, class_names, tolerance_deg=25.0, hint_deg=15.0):
+        self.references = references
+        self.class_names = list(class_names)
+        self.tolerance_deg = float(tolerance_deg)
+        self.hint_deg = float(hint_deg)
+        self._counts = None
+
+    @classmethod
+    def load(cls, path, class_names, **options):
+        references = np.load(path, mmap_mode="r")
+        if references.ndim != 3 or references.shape[2] != NUM_FEATURES:
+            raise ValueError(f"{path} holds {references.shape} signatures, expected (classes, references, {NUM_FEATURES})")
+        if references.shape[0] != len(class_names):
+            raise ValueError(f"{path} has {references.shape[0]} classes, the service uses {len(class_names)}")
+        return cls(references, class_names, **options)
+
+    def save(self, path):
+        np.save(path, np.asarray(self.references, dtype=np.float32))
+
+    @classmethod
+    def build(cls, features, labels, class_names, references=8, iterations=20, seed=0):
+        """Pick up to `references` representative samples per class from (n, NUM_FEATURES) features"""
+        features = np.asarray(features, dtype=np.float32)
+        labels = np.asarray(labels)
+        rng = np.random.default_rng(seed)
+        index = np.full((len(class_names), references, NUM_FEATURES), np.nan, dtype=np.float32)
+        for label in range(len(class_names)):
+            chosen = _medoids(features[labels == label], references, iterations, rng)
+            index[label, :len(chosen)] = chosen
+        return cls(index, class_names)
+
+    def reference_counts(self):
+        """Reference poses per class, in class_names order"""
+        if self._counts is None:
+            self._counts = (~np.isnan(self.references[:, :, 0])).sum(axis=1)
+        return self._counts
+
+    def score(self, points, target, is_left=False):
+        """
+        Compare (hands, 21, 3) landmark points with the references of mudra
+        `target`. Returns one dict per hand with the overall similarity and,
+        per finger, the mean joint-angle deviation in degrees, the fingertip
+        offset (in wrist-to-middle-knuckle lengths), a similarity and a
+        "bend"/"straighten" hint when the finger is off by more than hint_deg.
+        Raises KeyError for an unknown target and ValueError when it has no references.
+        """
+        refs = np.asarray(self.references[self.class_names.index(target)])
+        refs = refs[~np.isnan(refs[:, 0])]
+        if not len(refs):
+            raise ValueError(f"No reference poses for {target}")
+        features = landmark_features(points, is_left)
+        if not len(features):
+            return []
+
+        # (hands, references, 15) signed angle differences: positive = user's joint straighter
+        angle_diff = (features[:, None, ANGLE_OFFSET:] - refs[None, :, ANGLE_OFFSET:]) * 180.0
+        finger_dev = np.abs(angle_diff)[..., FINGER_JOINTS].mean(axis=-1)
+        overall = finger_dev.mean(axis=-1)
+        tips = features[:, :ANGLE_OFFSET].reshape(-1, 1, 21, 3)[:, :, FINGER_TIPS]
+        ref_tips = refs[:, :ANGLE_OFFSET].reshape(1, -1, 21, 3)[:, :, FINGER_TIPS]
+        tip_offset = np.linalg.norm(tips - ref_tips, axis=-1)
+
+        hands = np.arange(len(features))
+        best = overall.argmin(axis=1)
+        finger_dev, angle_diff, tip_offset = finger_dev[hands, best], angle_diff[hands, best], tip_offset[hands, best]
+        overall = overall[hands, best]
+        finger_similarity = 100.0 * np.exp(-finger_dev / self.tolerance_deg)
+        similarity = 100.0 * np.exp(-overall / self.tolerance_deg)
+        direction = angle_diff[:, FINGER_SCORE_JOINTS]
+
+        results = []
+        for hand in hands:
+            fingers = {}
+            for finger, name in enumerate(FINGER_NAMES):
+                hint = None
+                if finger_dev[hand, finger] > self.hint_deg:
+                    hint = "bend" if direction[hand, finger] > 0 else "straighten"
+                fingers[name] = {
+                    "deviation_deg": round(float(finger_dev[hand, finger]), 1),
+                    "tip_offset": round(float(tip_offset[hand, finger]), 3),
+                    "similarity": round(float(finger_similarity[hand, finger]), 1),
+                    "hint": hint,
+                }
+            results.append({
+                "target": target,
+                "similarity": round(float(similarity[hand]), 1),
+                "reference": int(best[hand]),
+                "fingers": fingers,
+            })
+        return results
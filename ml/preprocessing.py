@@ -0,0 +1,94 @@
+"""
+Single image preprocessing path shared by every ML endpoint and offline tool.
+
+The model was trained on RGB images resized to IMG_SIZE with bilinear
+interpolation, in the 0-255 range (MobileNetV3 rescales internally). Every
+caller goes through the functions here so the model always sees that input:
+
+- decode_rgb() decodes the upload once, at reduced resolution when the
+  source is much larger than needed, and converts BGR -> RGB in place,
+- model_input() crops with a view (no copy) and resizes straight into the
+  small uint8 model input,
+- the float32 cast happens when the batcher copies inputs into its
+  preallocated batch buffer, so no per-request float images are allocated.
+"""
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from labels import IMG_SIZE
+
+
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+
+def image_size(contents):
+    """(width, height) from the image header without decoding pixels, or None"""
+    try:
+        with Image.open(io.BytesIO(contents)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def decode_flag(contents, max_side=None):
+    """
+    Pick the largest reduction (1/2, 1/4, 1/8) that still keeps the long side
+    at or above max_side. For JPEG, OpenCV then decodes straight to the smaller
+    size (DCT scaling), so a 12 MP photo never exists at full resolution in memory.
+    """
+    if not max_side:
+        return cv2.IMREAD_COLOR
+    size = image_size(contents)
+    if size is None:
+        return cv2.IMREAD_COLOR
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if max(size) / factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_rgb(contents, max_side=None):
+    """
+    Decode image bytes into an RGB uint8 frame, or None if they are not an image.
+    With max_side, sources more than twice that size are decoded at reduced resolution.
+    """
+    frame = cv2.imdecode(np.frombuffer(contents, np.uint8), decode_flag(contents, max_side))
+    if frame is None:
+        return None
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+
+
+def model_input(rgb, box=None):
+    """
+    Crop an RGB frame to box=(x1, y1, x2, y2) (whole frame if None) and resize
+    it to the model's (IMG_SIZE, 3) uint8 input. Returns None for an empty crop.
+    """
+    if box is not None:
+        x1, y1, x2, y2 = box
+        rgb = rgb[y1:y2, x1:x2]
+    if rgb.size == 0:
+        return None
+    return cv2.resize(rgb, IMG_SIZE, interpolation=cv2.INTER_LINEAR)
+
+
+def to_bgr(rgb, copy=False):
+    """RGB frame -> BGR for OpenCV drawing/encoding; converts in place unless copy=True"""
+    if copy:
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=rgb)
+
+
+def load_model_input(path):
+    """Read an image file from disk into a model input (for offline tools)"""
+    with open(path, "rb") as f:
+        rgb = decode_rgb(f.read())
+    if rgb is None:
+        raise ValueError(f"Could not decode image {path}")
+    return model_input(rgb)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def request_scope(endpoint, options):
+    """Endpoint plus request options; responses are only shared within one scope"""
+    return f"{endpoint}:{json.dumps(options, sort_keys=True)}"
+
+
+def content_key(endpoint, contents, options):
+    """Exact-match key: hash of the uploaded bytes plus the request options"""
+    digest = hashlib.blake2b(contents, digest_size=16).hexdigest()
+    return f"{request_scope(endpoint, options)}:{digest}"
+
+
+def perceptual_hash(contents):
+    """
+    64-bit difference hash of a downscaled grayscale copy of the image, so
+    re-encoded or slightly recompressed snapshots of the same frame land within
+    a small Hamming distance. Returns None if the image cannot be decoded.
+    """
+    gray = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of endpoint responses, bounded both by entry count
+    and by the approximate serialized size of the cached responses.
+
+    Exact entries use content_key() strings. Near-duplicate entries use
+    (scope, perceptual_hash) tuple keys and are found with get_similar().
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_similar(self, scope, phash, max_distance):
+        """Near-duplicate lookup: newest entry in scope whose hash is within max_distance bits"""
+        with self._lock:
+            for key in reversed(self._entries):
+                if isinstance(key, tuple) and key[0] == scope and bin(key[1] ^ phash).count("1") <= max_distance:
+                    self._entries.move_to_end(key)
+                    self.near_hits += 1
+                    return self._entries[key][0]
+            return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "near_duplicate_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def hands_box(multi_hand_landmarks, w, h, expand=0.5, min_side=96):
+    """
+    Pixel box around every landmark of every hand, grown by `expand` times its
+    size on each side (and to at least min_side), clipped to the frame.
+    Returns None when there are no hands.
+    """
+    if not multi_hand_landmarks:
+        return None
+    xs = [lm.x for hand in multi_hand_landmarks for lm in hand.landmark]
+    ys = [lm.y for hand in multi_hand_landmarks for lm in hand.landmark]
+    x1, x2 = min(xs) * w, max(xs) * w
+    y1, y2 = min(ys) * h, max(ys) * h
+    pad_x = max((x2 - x1) * expand, (min_side - (x2 - x1)) / 2)
+    pad_y = max((y2 - y1) * expand, (min_side - (y2 - y1)) / 2)
+    box = (max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y)), min(w, int(x2 + pad_x)), min(h, int(y2 + pad_y)))
+    return box if box[2] > box[0] and box[3] > box[1] else None
+
+
+def to_frame_coordinates(multi_hand_landmarks, box, w, h):
+    """Rewrite landmarks normalized to a crop at box=(x1, y1, x2, y2) as normalized to the full frame"""
+    x1, y1, x2, y2 = box
+    crop_w, crop_h = x2 - x1, y2 - y1
+    for hand in multi_hand_landmarks:
+        for lm in hand.landmark:
+            lm.x = (lm.x * crop_w + x1) / w
+            lm.y = (lm.y * crop_h + y1) / h
+            # z is relative to the crop width, like x
+            lm.z = lm.z * crop_w / w
+
+
+class RoiSession:
+    """
+    Hand detection state for one client sending consecutive frames.
+
+    After a full-frame detection, following frames only run the session's
+    tracking-mode detector on an expanded crop around the previous hands, so
+    MediaPipe reuses its landmark ROI and skips palm detection while the hands
+    stay in view. A frame falls back to full detection when the crop loses a
+    hand, a handedness score drops below min_confidence, a hand touches the
+    crop border, or redetect_frames ROI frames have passed.
+    """
+
+    def __init__(self, hands, redetect_frames=30, min_confidence=0.7, expand=0.5):
+        self.hands = hands
+        self.redetect_frames = redetect_frames
+        self.min_confidence = min_confidence
+        self.expand = expand
+        self.roi = None
+        self.expected_hands = 0
+        self.frames_since_detection = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+
+    def process(self, frame, detect_full):
+        """Detect hands in an RGB frame; returns (results, "roi" | "full")"""
+        if self.closed:
+            # Evicted while this request waited for it
+            return detect_full(frame), "full"
+        h, w = frame.shape[:2]
+        if self.roi is not None and self.frames_since_detection < self.redetect_frames:
+            x1, y1, x2, y2 = self.roi
+            results = self.hands.process(np.ascontiguousarray(frame[y1:y2, x1:x2]))
+            if self._confident(results):
+                to_frame_coordinates(results.multi_hand_landmarks, self.roi, w, h)
+                self.frames_since_detection += 1
+                self.roi_frames += 1
+                self.roi = hands_box(results.multi_hand_landmarks, w, h, self.expand)
+                return results, "roi"
+
+        results = detect_full(frame)
+        self.frames_since_detection = 0
+        self.full_frames += 1
+        self.expected_hands = len(results.multi_hand_landmarks or [])
+        self.roi = hands_box(results.multi_hand_landmarks, w, h, self.expand)
+        return results, "full"
+
+    def _confident(self, results):
+        landmarks = results.multi_hand_landmarks
+        if not landmarks or len(landmarks) < self.expected_hands:
+            return False
+        if results.multi_handedness and min(
+                hand.classification[0].score for hand in results.multi_handedness) < self.min_confidence:
+            return False
+        # A hand at the crop edge is probably leaving it; look at the whole frame
+        margin = 0.01
+        return all(margin < lm.x < 1 - margin and margin < lm.y < 1 - margin
+                   for hand in landmarks for lm in hand.landmark)
+
+    def close(self):
+        self.closed = True
+        self.hands.close()
+
+
+class RoiSessionStore:
+    """
+    LRU of RoiSessions keyed by client-chosen session id. Each session holds
+    its own MediaPipe instance, so the store is bounded by max_sessions and
+    idle sessions are closed after ttl_seconds.
+    """
+
+    def __init__(self, factory, max_sessions=16, ttl_seconds=30.0, **session_options):
+        self._factory = factory
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = float(ttl_seconds)
+        self._session_options = session_options
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, session_id):
+        """Existing session for session_id, or a new one (evicting the oldest if full)"""
+        now = time.monotonic()
+        closing = []
+        with self._lock:
+            for key in [key for key, session in self._sessions.items() if now - session.last_used > self.ttl]:
+                closing.append(self._sessions.pop(key))
+            session = self._sessions.get(session_id)
+            if session is None:
+                while len(self._sessions) >= self.max_sessions:
+                    closing.append(self._sessions.popitem(last=False)[1])
+                session = self._sessions[session_id] = RoiSession(self._factory(), **self._session_options)
+                self.created += 1
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self.evicted += len(closing)
+        for old in closing:
+            # Wait for any frame still being processed by the evicted session
+            with old.lock:
+                old.close()
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), OrderedDict()
+        for session in sessions:
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            return {
+                "sessions": len(sessions),
+                "max_sessions": self.max_sessions,
+                "created": self.created,
+                "evicted": self.evicted,
+                "roi_frames": sum(session.roi_frames for session in sessions),
+                "full_frames": sum(session.full_frames for session in sessions),
+            }
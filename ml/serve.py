@@ -0,0 +1,145 @@
+"""
+Multi-process launcher for the ML API.
+
+Starts MODEL_PROCESSES model servers (model_server.py), each owning one copy
+of the model, and WEB_WORKERS uvicorn processes sharing one listening socket.
+Web workers run decoding, MediaPipe and the rest of app.py and send their
+batched crops to a model server through shared memory (INFERENCE_BACKEND=remote),
+so TensorFlow is loaded once per model server instead of once per worker.
+
+CPUs are split between the two roles and each process is pinned to its share
+with sched_setaffinity. TF intra-op threads match the model server's share,
+and each web worker's thread pool and detector pool match its own (at most 4,
+like app.py's default).
+
+Web workers do not share in-process state (annotated image links, ROI
+sessions, admission buckets, caches), so WEB_WORKERS defaults to 1, which
+runs plain single-process uvicorn without a model server.
+
+    python serve.py --workers 4 --model-processes 1 --port 8000
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+import time
+
+import uvicorn
+
+
+def plan_cpus(cpus, workers, model_processes, inference_cpus):
+    """
+    Split the available CPUs: inference_cpus for the model servers, the rest
+    for web workers. Returns ([cpus per model server], [cpus per web worker]).
+    Roles share CPUs when there are fewer CPUs than processes.
+    """
+    cpus = sorted(cpus)
+    inference_cpus = min(max(1, inference_cpus), len(cpus))
+    model_cpus, web_cpus = cpus[:inference_cpus], cpus[inference_cpus:] or cpus
+    per_model = [model_cpus[i::model_processes] or model_cpus for i in range(model_processes)]
+    per_worker = [web_cpus[i::workers] or [web_cpus[i % len(web_cpus)]] for i in range(workers)]
+    return per_model, per_worker
+
+
+def run_model_server(address, cpus, inter_op_threads):
+    from model_server import serve
+    serve(
+        address,
+        backend_kind=os.getenv("INFERENCE_BACKEND", "keras"),
+        model_path=os.getenv("MODEL_PATH", "best_mudra_model.keras"),
+        tflite_path=os.getenv("TFLITE_MODEL_PATH", "best_mudra_model.tflite"),
+        intra_op_threads=len(cpus),
+        inter_op_threads=inter_op_threads,
+        cpus=cpus,
+        compiled=os.getenv("TF_FUNCTION", "true").lower() in ("1", "true", "yes"),
+        jit_compile=os.getenv("TF_XLA", "false").lower() in ("1", "true", "yes"),
+        max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "16")),
+    )
+
+
+def run_web_worker(config_kwargs, sock, cpus, environment):
+    os.sched_setaffinity(0, cpus)
+    os.environ.update(environment)
+    uvicorn.Server(uvicorn.Config(**config_kwargs)).run(sockets=[sock])
+
+
+def main():
+    cpu_count = len(os.sched_getaffinity(0))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "1")))
+    parser.add_argument("--model-processes", type=int, default=int(os.getenv("MODEL_PROCESSES", "1")))
+    parser.add_argument("--inference-cpus", type=int,
+                        default=int(os.getenv("INFERENCE_CPUS", str(max(1, cpu_count // 4)))),
+                        help="CPUs reserved for the model servers")
+    parser.add_argument("--inter-op-threads", type=int, default=int(os.getenv("TF_INTER_OP_THREADS", "1")))
+    parser.add_argument("--socket-dir", default=os.getenv("MODEL_SERVER_SOCKET_DIR", "/tmp"))
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        # One worker gains nothing from a separate model server; keep the model
+        # in-process with every CPU available to it, like plain uvicorn
+        uvicorn.run("app:app", host=args.host, port=args.port)
+        return
+
+    model_cpus, worker_cpus = plan_cpus(os.sched_getaffinity(0), args.workers, args.model_processes,
+                                        args.inference_cpus)
+    # Children are spawned (not forked) so no TensorFlow or MediaPipe state is inherited
+    ctx = multiprocessing.get_context("spawn")
+    os.environ.setdefault("MODEL_SERVER_AUTHKEY", secrets.token_hex(16))
+    addresses = [os.path.join(args.socket_dir, f"mudra-model-{os.getpid()}-{i}.sock")
+                 for i in range(args.model_processes)]
+
+    processes = []
+    for address, cpus in zip(addresses, model_cpus):
+        process = ctx.Process(target=run_model_server, args=(address, cpus, args.inter_op_threads),
+                              name="model-server", daemon=True)
+        process.start()
+        processes.append(process)
+
+    config_kwargs = {"app": "app:app", "host": args.host, "port": args.port}
+    sock = uvicorn.Config(**config_kwargs).bind_socket()
+    for i, cpus in enumerate(worker_cpus):
+        # Same cap as app.py's default: affinity ignores container CPU quotas
+        threads = str(max(1, min(4, len(cpus))))
+        environment = {
+            "INFERENCE_BACKEND": "remote",
+            "MODEL_SERVER_ADDRESS": addresses[i % len(addresses)],
+            "WORKER_THREADS": os.getenv("WORKER_THREADS", threads),
+            "HANDS_POOL_SIZE": os.getenv("HANDS_POOL_SIZE", threads),
+        }
+        process = ctx.Process(target=run_web_worker, args=(config_kwargs, sock, cpus, environment),
+                              name=f"web-worker-{i}")
+        process.start()
+        processes.append(process)
+    print(f"Serving on {args.host}:{args.port}: {len(worker_cpus)} web workers on {worker_cpus}, "
+          f"{len(model_cpus)} model servers on {model_cpus}", file=sys.stderr)
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # Any process exiting takes the whole service down so the orchestrator restarts it cleanly
+    while not stopping and all(process.is_alive() for process in processes):
+        time.sleep(0.5)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout=10)
+    for address in addresses:
+        if os.path.exists(address):
+            os.remove(address)
+    sock.close()
+    sys.exit(0 if stopping else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import contextvars
+
+import pytest
+
+import admission
+from admission import AdmissionController
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Manually advanced stand-in for time.monotonic"""
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def admit(controller, client, cost, shed=False):
+    """admit() in its own context, like one HTTP request"""
+    context = contextvars.copy_context()
+    return context.run(controller.admit, client, cost, shed), context
+
+
+def test_burst_then_refill(clock):
+    controller = AdmissionController(rate=2.0, burst=4.0)
+    assert [admit(controller, "a", 1.0)[0] for _ in range(4)] == [None] * 4
+    assert admit(controller, "a", 1.0)[0] == (429, 1)
+
+    clock[0] += 1.0
+    assert admit(controller, "a", 1.0)[0] is None
+    assert admit(controller, "a", 1.0)[0] is None
+    assert admit(controller, "a", 1.0)[0][0] == 429
+
+    # Refill stops at burst however long the client was idle
+    clock[0] += 60.0
+    assert [admit(controller, "a", 1.0)[0] for _ in range(5)] == [None] * 4 + [(429, 1)]
+
+
+def test_retry_after_covers_missing_tokens(clock):
+    controller = AdmissionController(rate=0.5, burst=4.0)
+    assert admit(controller, "a", 3.0)[0] is None
+    # 1 token left, 3 needed at 0.5 tokens/s
+    assert admit(controller, "a", 3.0)[0] == (429, 4)
+    assert controller.stats()["rate_limited"] == 1
+
+
+def test_charge_bills_the_admitted_client_down_to_minus_burst(clock):
+    controller = AdmissionController(rate=1.0, burst=4.0)
+    rejected, context = admit(controller, "a", 1.0)
+    assert rejected is None
+    context.run(admission.charge, 100.0)
+    assert controller._buckets["a"].tokens == -4.0
+    assert admit(controller, "a", 1.0)[0] == (429, 5)
+    # Outside an admitted request, charge() does nothing
+    admission.charge(1.0)
+    assert controller._buckets["a"].tokens == -4.0
+
+
+def test_heaviest_clients_are_shed_first(clock):
+    load = [0.0]
+    controller = AdmissionController(rate=1.0, burst=10.0, shed_start=0.5, load=lambda: load[0], heavy_slots=100)
+    admit(controller, "heavy", 8.0)
+    admit(controller, "light", 1.0)
+
+    load[0] = 0.75
+    assert admit(controller, "heavy", 1.0, shed=True)[0][0] == 503
+    assert admit(controller, "light", 1.0, shed=True)[0] is None
+    # Requests that do not use the worker pool are never shed
+    assert admit(controller, "heavy", 1.0)[0] is None
+
+    load[0] = 1.0
+    assert admit(controller, "light", 1.0, shed=True)[0][0] == 503
+    assert controller.stats()["shed"] == 2
+
+
+def test_shed_retry_after_follows_latency(clock):
+    controller = AdmissionController(load=lambda: 1.0)
+    controller.observe(2.5)
+    assert admit(controller, "a", 1.0, shed=True)[0] == (503, 3)
+
+
+def test_heavy_client_in_flight_limit(clock):
+    controller = AdmissionController(rate=1.0, burst=8.0, load=lambda: 0.0, heavy_slots=2)
+    contexts = []
+    for _ in range(3):
+        rejected, context = admit(controller, "heavy", 2.0, shed=True)
+        assert rejected is None
+        contexts.append(context)
+    # Below half its burst with 3 requests in flight
+    assert admit(controller, "heavy", 0.0, shed=True)[0][0] == 503
+    assert admit(controller, "heavy", 0.0)[0] is None
+    assert admit(controller, "light", 1.0, shed=True)[0] is None
+
+    contexts[0].run(controller.finish, 0.1)
+    assert controller._buckets["heavy"].in_flight == 2
+    assert admit(controller, "heavy", 0.0, shed=True)[0][0] == 503
+    contexts[1].run(controller.finish, 0.1)
+    assert admit(controller, "heavy", 0.0, shed=True)[0] is None
+    assert controller.stats()["avg_latency_ms"] == 100.0
+
+
+def test_least_recently_seen_client_is_evicted(clock):
+    controller = AdmissionController(rate=1.0, burst=2.0, max_clients=2)
+    admit(controller, "a", 2.0)
+    admit(controller, "b", 2.0)
+    admit(controller, "a", 0.0)
+    admit(controller, "c", 2.0)
+    assert list(controller._buckets) == ["a", "c"]
+    # "b" starts over with a full bucket, "c" is still empty
+    assert admit(controller, "b", 2.0)[0] is None
+    assert admit(controller, "c", 2.0)[0][0] == 429
+
+
+def test_disabled_admits_everything(clock):
+    controller = AdmissionController(rate=1.0, burst=1.0, load=lambda: 1.0, enabled=False)
+    assert all(admit(controller, "a", 5.0)[0] is None for _ in range(10))
+    assert not controller._buckets
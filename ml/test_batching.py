@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from batching import InferenceBatcher
+
+IMAGE = np.zeros((4, 4, 3), dtype=np.float32)
+
+
+def slow_batcher(release):
+    """Batcher whose forward pass blocks until release is set"""
+    def predict(batch):
+        release.wait(5)
+        return np.ones((len(batch), 2), dtype=np.float32)
+    return InferenceBatcher(predict, max_batch_size=1, max_wait_ms=0)
+
+
+def disconnect_while_waiting(batcher, release, shield):
+    """Like a /predict_batch stream whose client goes away while its images are queued"""
+    async def main():
+        futures = [batcher.submit(IMAGE) for _ in range(3)]
+
+        async def stream():
+            for future in futures:
+                waiter = asyncio.wrap_future(future)
+                await (asyncio.shield(waiter) if shield else waiter)
+
+        task = asyncio.ensure_future(stream())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        release.set()
+        return futures
+    return asyncio.run(main())
+
+
+def test_shielded_disconnect_leaves_batcher_working():
+    release = threading.Event()
+    batcher = slow_batcher(release)
+    futures = disconnect_while_waiting(batcher, release, shield=True)
+    assert all(not future.cancelled() for future in futures)
+    assert batcher.predict(IMAGE).tolist() == [1.0, 1.0]
+    assert batcher._thread.is_alive()
+    batcher.close()
+
+
+def test_cancelled_futures_do_not_kill_batcher():
+    release = threading.Event()
+    batcher = slow_batcher(release)
+    disconnect_while_waiting(batcher, release, shield=False)
+    future = batcher.submit(IMAGE)
+    assert future.result(timeout=5).tolist() == [1.0, 1.0]
+    assert batcher._thread.is_alive()
+    batcher.close()
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from info_cache import MudraInfoCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MudraInfoCache(str(tmp_path / "mudra_info.sqlite"), prompt_version="test")
+    yield cache
+    cache.close()
+
+
+def counting_fetch(result, calls, delay=0.01):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fetch
+
+
+def test_concurrent_misses_share_one_fetch(cache):
+    calls = []
+
+    async def main():
+        fetch = counting_fetch({"name": "Pataka"}, calls)
+        return await asyncio.gather(*(cache.get_or_fetch(name, fetch) for name in ["Pataka", " pataka ", "PATAKA"]))
+
+    assert asyncio.run(main()) == [{"name": "Pataka"}] * 3
+    assert len(calls) == 1
+    assert cache.stats() == {"entries": 1, "hits": 0, "misses": 1, "coalesced": 2, "errors": 0, "in_flight": 0}
+
+    async def again():
+        return await cache.get_or_fetch("pataka", counting_fetch({}, calls))
+
+    assert asyncio.run(again()) == {"name": "Pataka"}
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached(cache):
+    calls = []
+
+    async def main(result):
+        fetch = counting_fetch(result, calls)
+        return await asyncio.gather(*(cache.get_or_fetch("Pataka", fetch) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main(RuntimeError("Gemini down")))
+    assert [type(r) for r in results] == [RuntimeError] * 3
+    assert len(calls) == 1
+    assert cache.get("Pataka") is None
+    assert cache.stats()["errors"] == 1
+
+    assert asyncio.run(main({"name": "Pataka"})) == [{"name": "Pataka"}] * 3
+    assert len(calls) == 2
+
+
+def test_waiter_takes_over_when_owner_is_cancelled(cache):
+    calls = []
+
+    async def main():
+        owner = asyncio.ensure_future(cache.get_or_fetch("Pataka", counting_fetch({"from": "owner"}, calls, 1.0)))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_fetch("Pataka", counting_fetch({"from": "waiter"}, calls)))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return await waiter
+
+    assert asyncio.run(main()) == {"from": "waiter"}
+    assert len(calls) == 2
+    assert cache.get("Pataka") == {"from": "waiter"}
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_still_raises(cache):
+    async def main():
+        owner = asyncio.ensure_future(cache.get_or_fetch("Pataka", counting_fetch({"from": "owner"}, [], 0.1)))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_fetch("Pataka", counting_fetch({}, [])))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The owner's fetch is not affected by its waiter going away
+        return await owner
+
+    assert asyncio.run(main()) == {"from": "owner"}
+
+
+def test_entries_expire_and_follow_prompt_version(tmp_path):
+    path = str(tmp_path / "mudra_info.sqlite")
+    cache = MudraInfoCache(path, prompt_version="v1")
+    cache.set("Pataka", {"name": "Pataka"})
+    assert cache.get("pataka") == {"name": "Pataka"}
+    cache.close()
+
+    for other in (MudraInfoCache(path, prompt_version="v2"), MudraInfoCache(path, prompt_version="v1", ttl_seconds=-1)):
+        assert other.get("Pataka") is None
+        other.close()
@@ -0,0 +1,62 @@
+import json
+import random
+
+import pytest
+
+from mudra_info import JsonFieldStream
+
+DETAILS = {
+    "name": "Pataka",
+    "meaning": "Flag, with \"quotes\", a \\ backslash, commas, {braces} and [brackets]",
+    "usage": ["clouds", "forest", "a river, flowing"],
+    "nested": {"a": [1, {"b": "}"}], "c": None},
+    "unicode": "पताका",
+    "count": 4,
+}
+
+
+def stream_members(text, sizes):
+    """Feed text in chunks of the given sizes, returning (members, stream)"""
+    stream = JsonFieldStream()
+    members, pos = [], 0
+    for size in sizes:
+        members.extend(stream.feed(text[pos:pos + size]))
+        pos += size
+    members.extend(stream.feed(text[pos:]))
+    return members, stream
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_split_point(indent):
+    text = json.dumps(DETAILS, indent=indent, ensure_ascii=False)
+    for split in range(len(text) + 1):
+        members, stream = stream_members(text, [split])
+        assert dict(members) == DETAILS, split
+        assert [key for key, _ in members] == list(DETAILS)
+        stream.close()
+
+
+def test_random_chunks():
+    text = json.dumps(DETAILS)
+    rng = random.Random(0)
+    for _ in range(200):
+        sizes = [rng.randint(0, 6) for _ in range(len(text))]
+        members, stream = stream_members(text, sizes)
+        assert members == list(DETAILS.items())
+        assert stream.complete
+
+
+def test_members_arrive_as_soon_as_they_are_complete():
+    stream = JsonFieldStream()
+    assert stream.feed('{"name": "Pat') == []
+    assert stream.feed('aka", "usage": ["a", ') == [("name", "Pataka")]
+    assert stream.feed('"b"]') == []
+    assert stream.feed("}") == [("usage", ["a", "b"])]
+    assert stream.complete
+
+
+def test_close_rejects_truncated_object():
+    stream = JsonFieldStream()
+    stream.feed('{"name": "Pataka", "meaning": "Fl')
+    with pytest.raises(ValueError):
+        stream.close()
@@ -0,0 +1,93 @@
+import json
+
+import cv2
+import numpy as np
+
+from result_cache import ResultCache, content_key, perceptual_hash, request_scope
+
+
+def jpeg(image, quality=90):
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def frame(seed=0, size=256):
+    """Smooth random image, so small recompression changes do not flip many hash bits"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (size, size), interpolation=cv2.INTER_CUBIC)
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_lru_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    value = {"label": "x" * 80}
+    size = len(json.dumps(value))
+    cache = ResultCache(max_entries=100, max_bytes=3 * size)
+    for key in "abc":
+        cache.put(key, value)
+    cache.get("a")
+    cache.put("d", value)
+    assert [key for key in "abcd" if cache.get(key) is not None] == ["a", "c", "d"]
+    assert cache.stats()["bytes"] == 3 * size
+
+    # Replacing an entry does not count its old size twice
+    cache.put("a", value)
+    assert cache.stats()["bytes"] == 3 * size
+    # A value larger than the whole cache is not stored and evicts nothing
+    cache.put("huge", {"label": "x" * 1000})
+    assert cache.get("huge") is None
+    assert cache.stats()["entries"] == 3
+
+
+def test_disabled_cache_stores_nothing():
+    for cache in (ResultCache(max_entries=0), ResultCache(max_bytes=0)):
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+
+def test_content_key_depends_on_bytes_and_options():
+    key = content_key("/predict", b"image", {"classifier": "cnn"})
+    assert key == content_key("/predict", b"image", {"classifier": "cnn"})
+    assert key != content_key("/predict", b"image2", {"classifier": "cnn"})
+    assert key != content_key("/predict", b"image", {"classifier": "landmark"})
+    assert key != content_key("/hand_analysis", b"image", {"classifier": "cnn"})
+
+
+def test_perceptual_hash_survives_recompression():
+    image = frame()
+    original = perceptual_hash(jpeg(image, 95))
+    assert distance(original, perceptual_hash(jpeg(image, 60))) <= 4
+    assert distance(original, perceptual_hash(cv2.imencode(".png", image)[1].tobytes())) <= 4
+    assert distance(original, perceptual_hash(jpeg(frame(seed=1)))) > 10
+    assert perceptual_hash(b"not an image") is None
+
+
+def test_near_duplicate_lookup():
+    cache = ResultCache()
+    scope = request_scope("/predict", {"classifier": "cnn"})
+    image = frame()
+    cache.put((scope, perceptual_hash(jpeg(image, 95))), {"label": "Pataka"})
+    cache.put((scope, perceptual_hash(jpeg(frame(seed=1)))), {"label": "Mushti"})
+
+    assert cache.get_similar(scope, perceptual_hash(jpeg(image, 60)), max_distance=4) == {"label": "Pataka"}
+    assert cache.get_similar(scope, perceptual_hash(jpeg(frame(seed=2))), max_distance=4) is None
+    other_scope = request_scope("/predict", {"classifier": "landmark"})
+    assert cache.get_similar(other_scope, perceptual_hash(jpeg(image, 95)), max_distance=4) is None
+    assert cache.stats()["near_duplicate_hits"] == 1
+
+    # Exact-match string keys are never returned by get_similar
+    cache.put(content_key("/predict", jpeg(image), {}), {"label": "exact"})
+    assert cache.get_similar(scope, perceptual_hash(jpeg(image, 95)), max_distance=64) != {"label": "exact"}
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from video import MudraTimeline, sample_step, sampled_frame_interval
+
+CLASSES = ["Pataka", "Tripataka", "Mushti"]
+
+
+def probs(label, confidence=0.9):
+    p = np.full(len(CLASSES), (1 - confidence) / (len(CLASSES) - 1), dtype=np.float32)
+    p[label] = confidence
+    return p
+
+
+def run_timeline(labels, source_fps, sample_fps):
+    """Feed one hand's per-sampled-frame labels the way /video_analysis does"""
+    interval = sampled_frame_interval(source_fps, sample_fps)
+    timeline = MudraTimeline(CLASSES, interval)
+    for i, label in enumerate(labels):
+        timeline.add(i * interval, "Right", probs(label))
+    return timeline.finish(), interval
+
+
+def test_sampling_interval():
+    assert sample_step(30, 5) == 6
+    assert sample_step(30, 0) == 1
+    assert sampled_frame_interval(30, 1) == pytest.approx(1.0)
+    assert sampled_frame_interval(25, 5) == pytest.approx(0.2)
+    assert sampled_frame_interval(0, 5) == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize("sample_fps", [1, 5])
+def test_steady_mudra_is_one_segment(sample_fps):
+    frames = 10 * sample_fps
+    segments, interval = run_timeline([0] * frames, 30, sample_fps)
+    assert len(segments) == 1
+    assert segments[0]["mudra"] == "Pataka"
+    assert segments[0]["start"] == 0
+    assert segments[0]["end"] == pytest.approx(frames * interval)
+
+
+@pytest.mark.parametrize("sample_fps", [1, 5])
+def test_single_frame_flicker_does_not_split(sample_fps):
+    labels = [0] * (5 * sample_fps) + [1] + [0] * (5 * sample_fps)
+    segments, _ = run_timeline(labels, 30, sample_fps)
+    assert [segment["mudra"] for segment in segments] == ["Pataka"]
+
+
+def test_mudra_change_splits():
+    segments, _ = run_timeline([0] * 10 + [2] * 10, 30, 5)
+    assert [segment["mudra"] for segment in segments] == ["Pataka", "Mushti"]
+    assert segments[0]["end"] <= segments[1]["start"] + 0.2
+
+
+def test_missing_hand_ends_segment_after_max_gap():
+    interval = sampled_frame_interval(30, 5)
+    timeline = MudraTimeline(CLASSES, interval, max_gap=0.5)
+    for i in range(5):
+        timeline.add(i * interval, "Right", probs(0))
+    for i in range(10, 15):
+        timeline.add(i * interval, "Right", probs(0))
+    segments = timeline.finish()
+    assert [(segment["start"], segment["end"]) for segment in segments] == [(0, 1.0), (2.0, 3.0)]
+
+
+def test_short_and_uncertain_segments_are_dropped():
+    segments, _ = run_timeline([0], 30, 5)
+    assert segments == []
+
+    timeline = MudraTimeline(CLASSES, 0.2)
+    for i in range(10):
+        timeline.add(i * 0.2, "Left", probs(0, confidence=0.35))
+    assert timeline.finish() == []
@@ -0,0 +1,86 @@
+"""
+Fit the landmark-geometry mudra classifier used by /hand_analysis?classifier=landmark.
+
+Runs MediaPipe over a dataset laid out like the CNN training data (one
+sub-folder per mudra, names matching class_names), extracts normalized
+landmark features for the first detected hand and fits a softmax regression.
+
+    python train_landmark_classifier.py --dataset-dir Bharatanatyam-Mudra-Dataset --output landmark_classifier.npz
+"""
+import argparse
+import os
+import random
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from hand_geometry import landmark_array, landmark_features
+from labels import class_names
+from landmark_classifier import LandmarkClassifier
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def extract_features(dataset_dir):
+    features, labels = [], []
+    skipped = 0
+    with mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.6) as hands:
+        for label, name in enumerate(class_names):
+            class_dir = os.path.join(dataset_dir, name)
+            if not os.path.isdir(class_dir):
+                print(f"Warning: no folder for class {name}")
+                continue
+            for file_name in sorted(os.listdir(class_dir)):
+                if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                frame = cv2.imread(os.path.join(class_dir, file_name))
+                if frame is None:
+                    skipped += 1
+                    continue
+                results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                if not results.multi_hand_landmarks:
+                    skipped += 1
+                    continue
+                h, w, _ = frame.shape
+                points = landmark_array(results.multi_hand_landmarks[0], w, h)
+                is_left = results.multi_handedness[0].classification[0].label == "Left"
+                features.append(landmark_features(points, is_left))
+                labels.append(label)
+    print(f"Extracted {len(features)} hands, skipped {skipped} images without a detectable hand")
+    return np.array(features), np.array(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset-dir", required=True)
+    parser.add_argument("--output", default="landmark_classifier.npz")
+    parser.add_argument("--val-split", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=123)
+    args = parser.parse_args()
+
+    features, labels = extract_features(args.dataset_dir)
+    order = list(range(len(labels)))
+    random.Random(args.seed).shuffle(order)
+    split = int(len(order) * (1 - args.val_split))
+    train, val = order[:split], order[split:]
+
+    classifier = LandmarkClassifier.fit(features[train], labels[train], class_names, epochs=args.epochs)
+    train_acc = (classifier.predict(features[train]).argmax(axis=1) == labels[train]).mean()
+    print(f"Train accuracy: {train_acc * 100:.2f}%")
+    if val:
+        val_probs = classifier.predict(features[val])
+        val_acc = (val_probs.argmax(axis=1) == labels[val]).mean()
+        top3 = np.argsort(val_probs, axis=1)[:, -3:]
+        val_top3 = np.mean([y in t for y, t in zip(labels[val], top3)])
+        print(f"Validation accuracy: {val_acc * 100:.2f}% (top-3 {val_top3 * 100:.2f}%)")
+
+    # Refit on everything before saving
+    classifier = LandmarkClassifier.fit(features, labels, class_names, epochs=args.epochs)
+    classifier.save(args.output)
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+import cv2
+
+
+def sample_step(source_fps, sample_fps):
+    """Source frames per sampled frame, as used by iter_sampled_frames"""
+    return max(1, round(source_fps / sample_fps)) if sample_fps else 1
+
+
+def sampled_frame_interval(source_fps, sample_fps):
+    """Seconds between sampled frames (unknown source fps is read as 30, like iter_sampled_frames)"""
+    source_fps = source_fps or 30.0
+    return sample_step(source_fps, sample_fps) / source_fps
+
+
+def iter_sampled_frames(path, sample_fps=5.0, max_side=None):
+    """
+    Yield (timestamp_s, rgb_frame) for a video file at roughly sample_fps.
+
+    Frames are read one at a time; skipped frames are only grab()bed (no color
+    conversion or copy), and sampled ones are downscaled to max_side, so memory
+    stays flat regardless of clip length. Raises ValueError if the file cannot
+    be opened as a video.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Invalid video file")
+    try:
+        source_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = sample_step(source_fps, sample_fps)
+        index = 0
+        while capture.grab():
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                if max_side and max(frame.shape[:2]) > max_side:
+                    scale = max_side / max(frame.shape[:2])
+                    frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                yield index / source_fps, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            index += 1
+    finally:
+        capture.release()
+
+
+def video_info(path):
+    """(fps, frame_count, duration_s) from the container header, or zeros if unknown"""
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        return fps, frames, frames / fps if fps else 0.0
+    finally:
+        capture.release()
+
+
+class MudraTimeline:
+    """
+    Turns per-frame, per-hand probability vectors into (start, end, hand,
+    mudra, confidence) segments.
+
+    Each hand's probabilities are smoothed with an exponential moving average,
+    so single-frame flickers do not split a segment. A segment ends when the
+    smoothed top class changes, drops below min_confidence, or the hand is not
+    seen for more than max_gap seconds (at least two frame intervals, so
+    sparse sampling does not end a track at every frame). Segments shorter
+    than min_duration are discarded. Only the open segment per hand is kept in
+    memory.
+    """
+
+    def __init__(self, class_names, frame_interval, smoothing=0.6, min_confidence=0.4,
+                 min_duration=0.4, max_gap=0.5):
+        self.class_names = class_names
+        self.frame_interval = frame_interval
+        self.smoothing = smoothing
+        self.min_confidence = min_confidence
+        self.min_duration = min_duration
+        self.max_gap = max(max_gap, 2 * frame_interval)
+        self.segments = []
+        self._hands = {}
+
+    def add(self, t, hand, probs):
+        """Record one observation of `hand` at time t"""
+        self.expire(t)
+        state = self._hands.get(hand)
+        probs = np.asarray(probs, dtype=np.float32)
+        if state is None:
+            state = self._hands[hand] = {"ema": probs, "segment": None, "last": t}
+        else:
+            state["ema"] = self.smoothing * state["ema"] + (1 - self.smoothing) * probs
+            state["last"] = t
+
+        label = int(np.argmax(state["ema"]))
+        confidence = float(state["ema"][label])
+        segment = state["segment"]
+        if confidence < self.min_confidence:
+            label = None
+        if segment is not None and segment["label"] == label:
+            segment["end"] = t
+            segment["confidence_sum"] += confidence
+            segment["frames"] += 1
+            return
+        self._close(hand, state)
+        if label is not None:
+            state["segment"] = {"label": label, "start": t, "end": t, "confidence_sum": confidence, "frames": 1}
+
+    def expire(self, t):
+        """Close segments of hands that have not been seen for more than max_gap"""
+        for hand in [hand for hand, state in self._hands.items() if t - state["last"] > self.max_gap]:
+            self._close(hand, self._hands.pop(hand))
+
+    def finish(self):
+        for hand in list(self._hands):
+            self._close(hand, self._hands.pop(hand))
+        self.segments.sort(key=lambda segment: (segment["start"], segment["hand"]))
+        return self.segments
+
+    def _close(self, hand, state):
+        segment = state["segment"]
+        state["segment"] = None
+        if segment is None:
+            return
+        end = segment["end"] + self.frame_interval
+        if end - segment["start"] < self.min_duration:
+            return
+        self.segments.append({
+            "start": round(segment["start"], 3),
+            "end": round(end, 3),
+            "hand": hand,
+            "mudra": self.class_names[segment["label"]],
+            "confidence": round(segment["confidence_sum"] / segment["frames"], 4),
+        })